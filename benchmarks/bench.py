@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Measure the throughput and memory of each query against the fake Github
+# GraphQL API: PYTHONPATH=. python3 benchmarks/bench.py --records 5000
+
+import argparse
+import json
+import logging
+import resource
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from tests.fakegithub import FakeGithub
+from yoshiki.helpers import Query
+from yoshiki.main import GithubGraphQLQuery, Repositories, SearchProjects
+from yoshiki.repository import Stargazers, Watchers
+from yoshiki.user import Followers, Following
+
+
+def scenarios(fake: FakeGithub, records: int) -> List[Tuple[str, Callable[[], Query]]]:
+    # The fake search returns the repositories with more stars than the
+    # given bound, pick it so that the search reads the expected records
+    stars = fake.stars[max(fake.repositories - records - 1, 0)]
+    return [
+        ('search-projects', lambda: SearchProjects(argparse.Namespace(stars=stars, terms=''))),
+        ('list-followers', lambda: Followers(argparse.Namespace(username='toto'))),
+        ('list-following', lambda: Following(argparse.Namespace(username='toto'))),
+        ('list-repositories', lambda: Repositories(argparse.Namespace(username='toto'))),
+        ('list-stargazers', lambda: Stargazers(argparse.Namespace(
+            repository=fake.repository_with_stars(records)))),
+        ('list-watchers', lambda: Watchers(argparse.Namespace(repository='owner0/repo0'))),
+    ]
+
+
+def bench(fake: FakeGithub, gql: GithubGraphQLQuery, query: Query) -> Dict[str, Any]:
+    stats = dict(fake.stats)
+    tracemalloc.start()
+    start = time.monotonic()
+    ret: Dict[str, Any] = {}
+    records = 0
+    try:
+        for page in gql.iter_pages(query):
+            records += len(page)
+    except Exception as e:
+        ret['error'] = str(e)[:200]
+    elapsed = time.monotonic() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    pages = fake.stats['requests'] - stats['requests']
+    cost = fake.stats['cost'] - stats['cost']
+    ret.update(
+        records=records, pages=pages, seconds=round(elapsed, 3),
+        pages_per_sec=round(pages / elapsed, 1),
+        records_per_sec=round(records / elapsed, 1),
+        records_per_point=round(records / cost, 1) if cost else None,
+        bytes=fake.stats['bytes'] - stats['bytes'],
+        wire_bytes=fake.stats['wire_bytes'] - stats['wire_bytes'],
+        connections=fake.stats['connections'] - stats['connections'],
+        errors=fake.stats['errors'] - stats['errors'],
+        peak_memory_kb=peak // 1024,
+        max_rss_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    return ret
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog='bench')
+    parser.add_argument('--records', type=int, default=2000,
+                        help='Number of records read by each query')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Average latency of the fake API in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Ratio of 502 responses')
+    parser.add_argument('--secondary-rate', type=float, default=0.0,
+                        help='Ratio of secondary rate limit responses')
+    parser.add_argument('--rate-limit', type=int, default=1000000,
+                        help='Rate limit points of the fake API')
+    parser.add_argument('--json-decoder', default='auto',
+                        help='auto, orjson, json or stream')
+    parser.add_argument('--scenario', action='append',
+                        help='Only run these scenarios')
+    parser.add_argument('--json', action='store_true', help='Print a json report')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    fake = FakeGithub(
+        repositories=max(args.records * 2, 1000), max_stars=args.records * 100,
+        followers=args.records, following=args.records, watchers=args.records,
+        user_repositories=args.records, latency=args.latency,
+        error_rate=args.error_rate, secondary_rate=args.secondary_rate,
+        rate_limit=args.rate_limit).start()
+    report: Dict[str, Dict[str, Any]] = {}
+    try:
+        gql = GithubGraphQLQuery('fake-token', fake.url, json_decoder=args.json_decoder)
+        for name, query in scenarios(fake, args.records):
+            if args.scenario and name not in args.scenario:
+                continue
+            report[name] = bench(fake, gql, query())
+    finally:
+        fake.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    columns = ['records', 'pages', 'seconds', 'pages_per_sec', 'records_per_sec',
+               'records_per_point', 'peak_memory_kb', 'errors']
+    print('%-18s' % 'scenario' + ''.join('%18s' % column for column in columns))
+    for name, result in report.items():
+        print('%-18s' % name + ''.join('%18s' % result.get(column) for column in columns))
+        if 'error' in result:
+            print('  error: %s' % result['error'])
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,7 @@ setup(
     entry_points={
         'console_scripts': [
             'yoshiki=yoshiki.main:main',
+            'yoshiki-client=yoshiki.client:main',
         ]
     }
 )
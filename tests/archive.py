@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import os
+import tempfile
+import unittest
+from . fakegithub import FakeGithub
+
+import yoshiki.main
+from yoshiki.archive import Archive
+from yoshiki.transport import LocalTransport
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'pages.gz')
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def search(self) -> yoshiki.main.SearchProjects:
+        return yoshiki.main.SearchProjects(argparse.Namespace(
+            stars=self.fake.stars[99], terms=''))
+
+    def test_record_replay(self) -> None:
+        self.fake = FakeGithub(repositories=400, max_stars=1000)
+        archive = Archive(self.path)
+        gql = yoshiki.main.GithubGraphQLQuery(
+            "fake-token", 'local', transport=LocalTransport(self.fake.handle), archive=archive)
+        recorded = gql.run(self.search())
+        archive.close()
+        requests = self.fake.stats['requests']
+
+        replay = Archive(self.path)
+        self.assertEqual(len(replay), requests - 1)
+        self.assertEqual([header['kind'] for header, _ in replay], ['search'] * len(replay))
+        gql = yoshiki.main.GithubGraphQLQuery(
+            "none", 'local', transport=LocalTransport(self.fake.handle), replay=replay)
+        # Pages are found by cursor whatever the page size
+        query = self.search()
+        query.page_size.pin(100)
+        self.assertEqual(gql.run(query), recorded)
+        self.assertEqual(self.fake.stats['requests'], requests)
+
+        query = yoshiki.main.SearchProjects(argparse.Namespace(stars=1, terms=''))
+        self.assertRaises(Exception, gql.run, query)
+
+        # Pages are found whatever the fields read
+        query = yoshiki.main.SearchProjects(argparse.Namespace(
+            stars=self.fake.stars[99], terms='', fields='name,stars'))
+        self.assertEqual(
+            [(repo['name'], repo['stars']) for repo in gql.run(query)],
+            [(repo['name'], repo['stars']) for repo in recorded])
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import json
+import unittest
+from . utils import github_mock, timestamp
+from typing import Any, Dict
+
+import yoshiki.main
+import yoshiki.user
+
+
+def followers(login: str, hasNext: bool) -> Dict[str, Any]:
+    return dict(followers=dict(
+        pageInfo=dict(hasNextPage=hasNext, endCursor='4242'), edges=[
+            dict(node=dict(name=login, login=login))]))
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.responses = [json.dumps(
+            dict(data=dict(rateLimit=dict(limit=5000, cost=1, remaining=5000, resetAt=timestamp(3600)))))]
+        self.httpd, self.thread = github_mock(self.responses)
+
+    def tearDown(self) -> None:
+        self.httpd.shutdown()
+        self.thread.join()
+
+    def test_run_batch(self) -> None:
+        self.responses += map(json.dumps, [
+            dict(data=dict(q0=followers('toto', True), q1=followers('titi', False))),
+            dict(data=dict(q0=followers('tata', False)))])
+        gql = yoshiki.main.GithubGraphQLQuery("fake-token", 'http://localhost:8080')
+        queries = [
+            yoshiki.user.Followers(argparse.Namespace(username=username))
+            for username in ('toto', 'titi')]
+        results = gql.run_batch(queries, size=20)
+        self.assertEqual(
+            [[user['login'] for user in users] for users in results],
+            [['toto', 'tata'], ['titi']])
+        self.assertEqual(gql.query_count, 3)
+
+    def test_not_found(self) -> None:
+        self.responses += map(json.dumps, [
+            dict(data=dict(q0=followers('toto', True), q1=None), errors=[
+                dict(type='NOT_FOUND', path=['q1'], message="Could not resolve to a User")]),
+            dict(data=dict(q0=followers('tata', False)))])
+        gql = yoshiki.main.GithubGraphQLQuery("fake-token", 'http://localhost:8080')
+        queries = []
+        for username in ('toto', 'gone'):
+            query = yoshiki.user.Followers(argparse.Namespace(username=username))
+            query.ignore_not_found = True
+            queries.append(query)
+        with self.assertLogs('yoshiki.GithubGraphQLQuery', 'WARNING'):
+            results = gql.run_batch(queries, size=20)
+        self.assertEqual(
+            [[user['login'] for user in users] for users in results],
+            [['toto', 'tata'], []])
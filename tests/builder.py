@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import unittest
+from . fakegithub import FakeGithub
+
+import yoshiki.main
+from yoshiki.builder import PAGE_VARIABLES, Batch, Projection, compile_query
+from yoshiki.main import REPOSITORY_FIELDS
+
+
+class TestBuilder(unittest.TestCase):
+    def test_projection(self) -> None:
+        projection = Projection(REPOSITORY_FIELDS, ['name', 'owner', 'stars'])
+        self.assertEqual(projection.selection, 'nameWithOwner\nstargazers { totalCount }')
+        record = projection.extract(dict(nameWithOwner='toto/tata', stargazers=dict(totalCount=3)))
+        self.assertEqual(record.to_dict(), dict(name='toto/tata', owner='toto', stars=3))
+        self.assertRaises(Exception, Projection, REPOSITORY_FIELDS, ['name', 'size'])
+
+    def test_batch(self) -> None:
+        batch = Batch()
+        document = compile_query(
+            '{ user(login: "a$b") { followers(first: $first, after: $after) { totalCount } } }',
+            PAGE_VARIABLES)
+        self.assertEqual(batch.add('q0', document, dict(first=10, after=None)), 'user')
+        self.assertEqual(batch.add('q1', '{ search(query: "x") { repositoryCount } }'), 'search')
+        self.assertEqual(batch.document(), (
+            'query($q0_first: Int!, $q0_after: String) {\n'
+            'q0: user(login: "a$b") { followers(first: $q0_first, after: $q0_after) { totalCount } }\n'
+            'q1: search(query: "x") { repositoryCount }\n}'))
+        self.assertEqual(batch.variables, dict(q0_first=10, q0_after=None))
+
+
+class TestFields(unittest.TestCase):
+    def setUp(self) -> None:
+        self.fake = FakeGithub(repositories=200, max_stars=1000, topics=20).start()
+
+    def tearDown(self) -> None:
+        self.fake.stop()
+
+    def test_search_fields(self) -> None:
+        gql = yoshiki.main.GithubGraphQLQuery("fake-token", self.fake.url)
+        repos = gql.run(yoshiki.main.SearchProjects(argparse.Namespace(
+            stars=self.fake.stars[99], terms='', fields='name,stars')))
+        self.assertEqual(len(repos), 100)
+        self.assertEqual(list(repos[0]), ['name', 'stars'])
+        self.assertEqual(repos[0]['stars'], 1000)
+        projected = self.fake.stats['bytes']
+
+        gql.run(yoshiki.main.SearchProjects(argparse.Namespace(
+            stars=self.fake.stars[99], terms='')))
+        self.assertLess(projected * 3, self.fake.stats['bytes'] - projected)
+
+    def test_repositories_fields(self) -> None:
+        gql = yoshiki.main.GithubGraphQLQuery("fake-token", self.fake.url)
+        repos = gql.run(yoshiki.main.Repositories(argparse.Namespace(
+            username='toto', fields='name,stars,stargazers')))
+        self.assertEqual(len(repos), 100)
+        self.assertEqual(len(repos[0]['stargazers']), min(100, repos[0]['stars']))
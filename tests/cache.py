@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import tempfile
+import unittest
+from . fakegithub import FakeGithub
+from typing import Tuple
+
+import yoshiki.main
+from yoshiki.cache import ResponseCache
+from yoshiki.transport import LocalTransport
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_ttl(self) -> None:
+        cache = ResponseCache(self.tmpdir.name, ttl=3600, ttls=dict(search=0))
+        cache.put('url', '{ user(login: "toto") { login } }', dict(data=dict(user=1)))
+        cache.put('url', '{ search(query: "toto") { edges } }', dict(data=dict(search=1)))
+        cache.put('url', '{ rateLimit { remaining } }', dict(data=dict(rateLimit=1)))
+        self.assertEqual(
+            cache.get('url', '{ user(login: "toto") { login } }'), dict(data=dict(user=1)))
+        self.assertIsNone(cache.get('other', '{ user(login: "toto") { login } }'))
+        self.assertIsNone(cache.get('url', '{ search(query: "toto") { edges } }'))
+        self.assertIsNone(cache.get('url', '{ rateLimit { remaining } }'))
+
+    def test_eviction(self) -> None:
+        cache = ResponseCache(self.tmpdir.name, max_size=60)
+        cache.put('url', '{ user(login: "toto") { login } }', dict(data=dict(user='toto')))
+        cache.put('url', '{ user(login: "titi") { login } }', dict(data=dict(user='titi')))
+        cache.get('url', '{ user(login: "toto") { login } }')
+        cache.put('url', '{ user(login: "tata") { login } }', dict(data=dict(user='tata')))
+        self.assertIsNotNone(cache.get('url', '{ user(login: "toto") { login } }'))
+        self.assertIsNone(cache.get('url', '{ user(login: "titi") { login } }'))
+        self.assertIsNotNone(cache.get('url', '{ user(login: "tata") { login } }'))
+
+    def test_page_size(self) -> None:
+        fake = FakeGithub(repositories=300)
+        cache = ResponseCache(self.tmpdir.name)
+
+        def search(first: int) -> Tuple[int, int]:
+            gql = yoshiki.main.GithubGraphQLQuery(
+                "fake-token", 'local', cache=cache, transport=LocalTransport(fake.handle))
+            query = yoshiki.main.SearchProjects(argparse.Namespace(stars=0, terms=''))
+            assert query.page_size
+            query.page_size.pin(first)
+            requests = fake.stats['requests']
+            return len(gql.run(query)), fake.stats['requests'] - requests
+        count, requests = search(50)
+        self.assertGreater(requests, 1)
+        # The pages are found whatever their size
+        self.assertEqual(search(100), (count, 0))
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import json
+import os
+import tempfile
+import unittest
+from . search import mock_search
+from . utils import timestamp
+from typing import Any, Dict, Iterator, List, Tuple
+
+import yoshiki.main
+from yoshiki.checkpoint import Checkpoint
+from yoshiki.helpers import Query, Results
+from yoshiki.transport import LocalTransport
+from yoshiki.user import Followers
+
+
+def followers(login: str, hasNext: bool) -> Dict[str, Any]:
+    return dict(data=dict(user=dict(followers=dict(
+        pageInfo=dict(hasNextPage=hasNext, endCursor=login), edges=[
+            dict(node=dict(name=login, login=login))]))))
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.afters: List[Any] = []
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def iter_states(self, pages: List[Dict[str, Any]], ahead: int = 0) -> Any:
+        def iter_states(query: Query) -> Iterator[Tuple[Results, Dict[str, Any]]]:
+            assert isinstance(query, Followers)
+            fetched: List[Tuple[Results, Dict[str, Any]]] = []
+            while query.next_graph_query():
+                self.afters.append(query.after)
+                if not pages:
+                    raise Exception("Crawl died")
+                page = query.paginate(pages.pop(0))
+                fetched.append((page, query.state()))
+                # Fetch ahead of the consumer like a pipeline
+                if len(fetched) > ahead:
+                    page, state = fetched.pop(0)
+                    yield query.extract(page), state
+            for page, state in fetched:
+                yield query.extract(page), state
+        return iter_states
+
+    def test_resume(self) -> None:
+        query = Followers(argparse.Namespace(username='toto'))
+        pages = Checkpoint(self.tmpdir.name, 'job').iter_pages(
+            self.iter_states([followers('titi', True)]), query)
+        self.assertEqual(next(pages)[0]['login'], 'titi')
+        self.assertRaises(Exception, next, pages)
+
+        query = Followers(argparse.Namespace(username='toto'))
+        pages = Checkpoint(self.tmpdir.name, 'job').iter_pages(
+            self.iter_states([followers('tata', False)]), query)
+        self.assertEqual(
+            [user['login'] for page in pages for user in page], ['titi', 'tata'])
+        self.assertEqual(self.afters, [None, 'titi', 'titi'])
+
+    def test_uncommitted_first_page(self) -> None:
+        # A first page written without its state is not read twice
+        os.makedirs(os.path.join(self.tmpdir.name, 'job'))
+        with open(os.path.join(self.tmpdir.name, 'job', 'results.ndjson'), 'w') as f:
+            f.write('{"login": "titi"}\n')
+        query = Followers(argparse.Namespace(username='toto'))
+        checkpoint = Checkpoint(self.tmpdir.name, 'job')
+        pages = checkpoint.iter_pages(self.iter_states([followers('titi', False)]), query)
+        self.assertEqual([user['login'] for page in pages for user in page], ['titi'])
+        self.assertEqual(
+            [user['login'] for page in checkpoint.results() for user in page], ['titi'])
+        with open(checkpoint.results_path) as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+    def test_fetched_ahead(self) -> None:
+        query = Followers(argparse.Namespace(username='toto'))
+        pages = Checkpoint(self.tmpdir.name, 'job').iter_pages(
+            self.iter_states([followers('titi', True), followers('tutu', True)], 1), query)
+        self.assertEqual(next(pages)[0]['login'], 'titi')
+        pages.close()
+
+        # The second page was fetched but not consumed, it is read again
+        query = Followers(argparse.Namespace(username='toto'))
+        pages = Checkpoint(self.tmpdir.name, 'job').iter_pages(
+            self.iter_states([followers('tutu', False)]), query)
+        self.assertEqual(
+            [user['login'] for page in pages for user in page], ['titi', 'tutu'])
+        self.assertEqual(self.afters, [None, 'titi', 'titi'])
+
+    def test_dedup_journal(self) -> None:
+        responses = [dict(data=dict(rateLimit=dict(
+            limit=5000, cost=1, remaining=5000, resetAt=timestamp(3600))))]
+
+        def handle(body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+            if not responses:
+                raise Exception("Crawl died")
+            return 200, {}, json.dumps(responses.pop(0)).encode()
+        gql = yoshiki.main.GithubGraphQLQuery(
+            "fake-token", 'local', transport=LocalTransport(handle), pipeline_depth=0)
+
+        def search() -> Query:
+            return yoshiki.main.SearchProjects(argparse.Namespace(
+                stars=42, terms='', dedup='exact', dedup_capacity=10))
+        responses.append(mock_search('toto/tata', True))
+        pages = Checkpoint(self.tmpdir.name, 'job').iter_pages(gql.iter_states, search())
+        self.assertEqual(len(next(pages)), 1)
+        self.assertRaises(Exception, next, pages)
+        directory = os.path.join(self.tmpdir.name, 'job')
+        with open(os.path.join(directory, 'journal.ndjson')) as f:
+            self.assertEqual(f.read(), '"toto/tata"\n')
+        with open(os.path.join(directory, 'state.json')) as f:
+            self.assertNotIn('toto/tata', f.read())
+
+        responses += [mock_search('toto/tata', True), mock_search('titi/riri', False)]
+        query = search()
+        pages = Checkpoint(self.tmpdir.name, 'job').iter_pages(gql.iter_states, query)
+        self.assertEqual(
+            [repo['name'] for page in pages for repo in page], ['toto/tata', 'titi/riri'])
+        assert isinstance(query, yoshiki.main.SearchProjects) and query.dedup
+        self.assertEqual(query.dedup.duplicates, 1)
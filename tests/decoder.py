@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import json
+import unittest
+from . fakegithub import FakeGithub
+
+import yoshiki.main
+from yoshiki.decoder import get_decoder, json_loads, stream_loads
+from yoshiki.user import Followers
+
+
+class TestDecoder(unittest.TestCase):
+    def test_decoders(self) -> None:
+        self.assertIs(get_decoder('json'), json_loads)
+        self.assertEqual(get_decoder()(b'{"data": [1]}'), dict(data=[1]))
+        self.assertRaises(Exception, get_decoder, 'yaml')
+
+    def test_stream(self) -> None:
+        document = dict(data=dict(rateLimit=dict(cost=1), search=dict(
+            repositoryCount=2, pageInfo=dict(hasNextPage=False, endCursor=None),
+            edges=[dict(node=dict(name='a', topics=dict(edges=[1, 2]))),
+                   dict(node=dict(name='b \\"}]', topics=dict(edges=[])))])))
+        for content in [json.dumps(document), json.dumps(document, indent=2)]:
+            ret = stream_loads(content.encode())
+            search = ret['data']['search']
+            self.assertEqual(ret['data']['rateLimit'], dict(cost=1))
+            self.assertEqual(search['pageInfo'], dict(hasNextPage=False, endCursor=None))
+            self.assertEqual(list(search['edges']), document['data']['search']['edges'])  # type: ignore
+            self.assertRaises(Exception, list, search['edges'])
+        # Errors are decoded at once
+        ret = stream_loads(b'{"data": {"user": {"edges": []}}, "errors": [{"type": "NOT_FOUND"}]}')
+        self.assertEqual(ret['data']['user']['edges'], [])
+        ret = stream_loads(b'{"data": {"user": {"edges": [], "total": 1}}}')
+        self.assertRaises(Exception, list, ret['data']['user']['edges'])
+
+    def test_stream_query(self) -> None:
+        fake = FakeGithub(followers=250).start()
+        try:
+            gql = yoshiki.main.GithubGraphQLQuery("fake-token", fake.url, json_decoder='stream')
+            followers = gql.run(Followers(argparse.Namespace(username='toto')))
+            self.assertEqual(len(followers), 250)
+            self.assertEqual(followers[-1]['login'], 'toto-follower249')
+        finally:
+            fake.stop()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import json
+import unittest
+from . search import mock_search
+from . utils import timestamp
+from typing import Any, Dict, List, Tuple
+
+import yoshiki.main
+from yoshiki.dedup import BloomFilter, Dedup
+from yoshiki.transport import LocalTransport
+
+
+class TestDedup(unittest.TestCase):
+    def test_exact(self) -> None:
+        dedup = Dedup()
+        dedup.start_journal()
+        self.assertEqual(dedup.filter(['a', 'b', 'a'], str), ['a', 'b'])
+        self.assertEqual(dedup.journal(), ['a', 'b'])
+        self.assertEqual(dedup.filter(['b', 'c'], str), ['c'])
+        self.assertEqual(dedup.duplicates, 2)
+        # Each journal only holds the new keys
+        self.assertEqual(dedup.journal(), ['c'])
+        self.assertEqual(dedup.journal(), [])
+        restored = Dedup()
+        restored.restore(json.loads(json.dumps(dedup.state())))
+        restored.replay(['a', 'b', 'c'])
+        self.assertEqual(restored.filter(['a', 'd'], str), ['d'])
+        self.assertEqual(restored.duplicates, 3)
+
+    def test_bloom(self) -> None:
+        bloom = BloomFilter(10000, 0.01)
+        self.assertEqual(bloom.hashes, 7)
+        self.assertTrue(all(bloom.add('repo%d' % index) for index in range(5000)))
+        self.assertFalse(any(bloom.add('repo%d' % index) for index in range(5000)))
+        false_positives = sum(
+            not bloom.add('other%d' % index) for index in range(5000))
+        self.assertLess(false_positives, 50)
+
+    def test_journal(self) -> None:
+        # Without checkpoint the added keys are not kept
+        dedup = Dedup('bloom', 1000)
+        dedup.filter(['a', 'b'], str)
+        self.assertEqual(dedup.added, [])
+
+    def test_search(self) -> None:
+        pages = [
+            dict(data=dict(rateLimit=dict(
+                limit=5000, cost=1, remaining=5000, resetAt=timestamp(3600)))),
+            mock_search('toto/tata', True), mock_search('toto/tata', True),
+            mock_search('titi/riri', False)]
+        requests: List[Dict[str, Any]] = []
+
+        def handle(body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+            requests.append(json.loads(body))
+            return 200, {}, json.dumps(pages.pop(0)).encode()
+        gql = yoshiki.main.GithubGraphQLQuery(
+            "fake-token", 'local', transport=LocalTransport(handle))
+        query = yoshiki.main.SearchProjects(argparse.Namespace(
+            stars=42, terms='', fields='stars', dedup='bloom', dedup_capacity=1000))
+        # Streamed pages are not sorted, the duplicates are still reported
+        with self.assertLogs('yoshiki.Dedup', 'INFO') as logs:
+            self.assertEqual(sum(len(page) for page in gql.iter_pages(query)), 2)
+        self.assertEqual(logs.output, ['INFO:yoshiki.Dedup:1 duplicated records dropped'])
+        assert query.dedup
+        self.assertEqual(query.dedup.duplicates, 1)
+        # The name is read to find the duplicates but not returned
+        self.assertIn('nameWithOwner', requests[1]['query'])
@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# A programmable fake of the Github GraphQL API: it parses the documents sent
+# by yoshiki and resolves them against generated data of any size.
+
+import bisect
+import datetime
+import gzip
+import http.server
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+TOKEN = re.compile(
+    r'\s+|,|#[^\n]*|(\.\.\.|[{}():\[\]$!=@]|"(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?|\w+)')
+
+# A field is its alias, name, arguments and sub selections (None for a leaf).
+# Inline fragments are fields named '...' with the type condition as alias.
+Field = Tuple[str, str, Dict[str, Any], Optional[List[Any]]]
+
+
+class Parser(object):
+    def __init__(self, document: str, variables: Dict[str, Any]) -> None:
+        self.tokens = [token for token in TOKEN.findall(document) if token]
+        self.position = 0
+        self.variables = variables
+
+    def peek(self) -> str:
+        return self.tokens[self.position] if self.position < len(self.tokens) else ''
+
+    def take(self, expected: Optional[str] = None) -> str:
+        token = self.peek()
+        if expected and token != expected:
+            raise Exception("Expected %s got %s" % (expected, token))
+        self.position += 1
+        return token
+
+    def document(self) -> List[Field]:
+        if self.peek() == 'query':
+            self.take()
+            if self.peek() not in ('(', '{'):
+                self.take()
+            if self.peek() == '(':
+                # Variable definitions, only the default values matter
+                self.take('(')
+                while self.peek() != ')':
+                    self.take('$')
+                    name = self.take()
+                    self.take(':')
+                    while self.peek() not in ('$', ')', '='):
+                        self.take()
+                    if self.peek() == '=':
+                        self.take()
+                        self.variables.setdefault(name, self.value())
+                self.take(')')
+        return self.selections()
+
+    def selections(self) -> List[Field]:
+        fields: List[Field] = []
+        self.take('{')
+        while self.peek() != '}':
+            if self.peek() == '...':
+                self.take()
+                self.take('on')
+                fields.append((self.take(), '...', {}, self.selections()))
+                continue
+            alias = name = self.take()
+            if self.peek() == ':':
+                self.take()
+                name = self.take()
+            args: Dict[str, Any] = {}
+            if self.peek() == '(':
+                self.take()
+                while self.peek() != ')':
+                    key = self.take()
+                    self.take(':')
+                    args[key] = self.value()
+                self.take(')')
+            fields.append((alias, name, args, self.selections() if self.peek() == '{' else None))
+        self.take('}')
+        return fields
+
+    def value(self) -> Any:
+        token = self.take()
+        if token == '$':
+            return self.variables.get(self.take())
+        if token.startswith('"'):
+            return json.loads(token)
+        if token == '{':
+            obj: Dict[str, Any] = {}
+            while self.peek() != '}':
+                key = self.take()
+                self.take(':')
+                obj[key] = self.value()
+            self.take('}')
+            return obj
+        if token == '[':
+            items: List[Any] = []
+            while self.peek() != ']':
+                items.append(self.value())
+            self.take(']')
+            return items
+        if re.match(r'-?\d', token):
+            return float(token) if '.' in token else int(token)
+        return dict(true=True, false=False, null=None).get(token, token)
+
+
+def requests_count(fields: List[Field], parents: int = 1) -> int:
+    # The number of connection requests, as Github computes the query cost
+    total = 0
+    for alias, name, args, selections in fields:
+        if selections is None or name == 'rateLimit':
+            continue
+        if 'first' in args or 'ids' in args:
+            total += parents
+            total += requests_count(selections, parents * int(args.get('first') or len(args.get('ids') or [])))
+        else:
+            total += requests_count(selections, parents)
+    return total
+
+
+def resolve(obj: Dict[str, Any], fields: List[Field]) -> Dict[str, Any]:
+    ret: Dict[str, Any] = {}
+    for alias, name, args, selections in fields:
+        if name == '...':
+            if obj.get('__typename') == alias:
+                ret.update(resolve(obj, selections or []))
+            continue
+        value = obj.get(name)
+        if callable(value):
+            value = value(args)
+        if selections is not None and isinstance(value, dict):
+            value = resolve(value, selections)
+        elif selections is not None and isinstance(value, list):
+            value = [resolve(item, selections) if item else item for item in value]
+        ret[alias] = value
+    return ret
+
+
+def connection(total: int, node: Callable[[int], Dict[str, Any]], args: Dict[str, Any],
+               edge: Optional[Callable[[int], Dict[str, Any]]] = None,
+               offsets: Optional[List[int]] = None) -> Dict[str, Any]:
+    start = int(args['after']) if args.get('after') else 0
+    first = int(args.get('first') or 0)
+    size = len(offsets) if offsets is not None else total
+    edges = []
+    for index in range(start, min(start + first, size)):
+        item = offsets[index] if offsets is not None else index
+        edges.append(dict(cursor=str(index + 1), node=node(item), **(edge(item) if edge else {})))
+    return dict(
+        totalCount=total,
+        repositoryCount=total,
+        pageInfo=dict(hasNextPage=start + first < size,
+                      endCursor=str(start + len(edges)) if edges else args.get('after')),
+        edges=edges,
+        nodes=[edge['node'] for edge in edges])
+
+
+class FakeGithub(object):
+    def __init__(self, repositories: int = 1000, max_stars: int = 100000,
+                 followers: int = 100, following: int = 100,
+                 watchers: int = 100, topics: int = 5, user_repositories: int = 100,
+                 latency: float = 0.0, error_rate: float = 0.0,
+                 secondary_rate: float = 0.0, rate_limit: int = 5000,
+                 reset: int = 3600, seed: int = 42) -> None:
+        self.repositories = repositories
+        # Stars grow with the repository index following a power law
+        self.stars = [int(max_stars * ((index + 1) / repositories) ** 4)
+                      for index in range(repositories)]
+        self.followers = followers
+        self.following = following
+        self.watchers = watchers
+        self.topics = topics
+        self.user_repositories = user_repositories
+        self.latency = latency
+        self.error_rate = error_rate
+        self.secondary_rate = secondary_rate
+        self.rate_limit = rate_limit
+        self.remaining = rate_limit
+        self.last_cost = 1
+        self.reset = reset
+        self.reset_at = time.time() + reset
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats: Dict[str, int] = dict(
+            requests=0, errors=0, rate_limited=0, cost=0, bytes=0,
+            wire_bytes=0, connections=0)
+        self.httpd: Optional[http.server.ThreadingHTTPServer] = None
+
+    # Data model
+    def user(self, login: str) -> Dict[str, Any]:
+        return dict(
+            __typename='User', id='U_%s' % login, login=login, name=login.title(),
+            followers=lambda args: connection(
+                self.followers, lambda index: self.user('%s-follower%d' % (login, index)), args),
+            following=lambda args: connection(
+                self.following, lambda index: self.user('%s-following%d' % (login, index)), args),
+            repositories=lambda args: connection(
+                min(self.user_repositories, self.repositories),
+                lambda index: self.repository(self.repositories - index - 1), args))
+
+    def repository(self, index: int) -> Dict[str, Any]:
+        name = 'owner%d/repo%d' % (index % 1000, index)
+        now = time.time()
+        return dict(
+            __typename='Repository', id='R_%d' % index, nameWithOwner=name,
+            name=name.split('/')[1], description='Repository %d' % index,
+            createdAt=datetime.datetime.utcfromtimestamp(
+                1200000000 + index * 1000).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            defaultBranchRef=dict(name='master'),
+            stargazers=lambda args: connection(
+                self.stars[index], lambda star: self.user('%s-stargazer%d' % (name, star)), args,
+                lambda star: dict(starredAt=datetime.datetime.utcfromtimestamp(
+                    now - star * 3600).strftime('%Y-%m-%dT%H:%M:%SZ'))),
+            forks=dict(totalCount=index),
+            watchers=lambda args: connection(
+                self.watchers, lambda watcher: self.user('%s-watcher%d' % (name, watcher)), args),
+            repositoryTopics=lambda args: connection(
+                self.topics, lambda topic: dict(topic=dict(name='topic%d' % topic)), args))
+
+    def repository_with_stars(self, stars: int) -> str:
+        index = min(bisect.bisect_left(self.stars, stars), self.repositories - 1)
+        return 'owner%d/repo%d' % (index % 1000, index)
+
+    def search(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        query = args.get('query', '')
+        low, high = 0, float('inf')
+        stars = re.search(r'stars:(>|)(\d+)(?:\.\.(\d+))?', query)
+        if stars and stars.group(1):
+            low = int(stars.group(2)) + 1
+        elif stars:
+            low = int(stars.group(2))
+            high = int(stars.group(3)) if stars.group(3) else low
+        start = bisect.bisect_left(self.stars, low)
+        end = bisect.bisect_right(self.stars, high) if high != float('inf') else self.repositories
+        offsets = list(range(start, end))
+        if 'sort:stars-desc' in query:
+            offsets.reverse()
+        return connection(len(offsets), self.repository, args, offsets=offsets)
+
+    def node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        if node_id.startswith('R_') and node_id[2:].isdigit():
+            index = int(node_id[2:])
+            return self.repository(index) if index < self.repositories else None
+        if node_id.startswith('U_'):
+            return self.user(node_id[2:])
+        return None
+
+    def root(self) -> Dict[str, Any]:
+        return dict(
+            search=self.search,
+            user=lambda args: self.user(args['login']),
+            repository=lambda args: self.repository(
+                int(args['name'].replace('repo', '')) if args['name'].startswith('repo') else 0),
+            nodes=lambda args: [self.node(node_id) for node_id in args['ids']],
+            rateLimit=lambda args: dict(
+                limit=self.rate_limit, cost=self.last_cost, remaining=self.remaining,
+                resetAt=datetime.datetime.utcfromtimestamp(
+                    self.reset_at).strftime('%Y-%m-%dT%H:%M:%SZ')))
+
+    # Request handling
+    def handle(self, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        if self.latency:
+            time.sleep(self.random.uniform(self.latency / 2, self.latency * 3 / 2))
+        with self.lock:
+            self.stats['requests'] += 1
+            if self.random.random() < self.error_rate:
+                self.stats['errors'] += 1
+                return 502, {}, b'Bad gateway'
+            if self.random.random() < self.secondary_rate:
+                self.stats['errors'] += 1
+                return 403, {'Retry-After': '1'}, json.dumps(dict(
+                    message='You have exceeded a secondary rate limit')).encode()
+            request = json.loads(body)
+            fields = Parser(request['query'], request.get('variables') or {}).document()
+            cost = max(1, round(requests_count(fields) / 100))
+            if time.time() > self.reset_at:
+                self.remaining = self.rate_limit
+                self.reset_at = time.time() + self.reset
+            if cost > self.remaining:
+                self.stats['rate_limited'] += 1
+                data = json.dumps(dict(data=None, errors=[dict(
+                    type='RATE_LIMITED', message='API rate limit exceeded')])).encode()
+                return 200, {'Content-Type': 'application/json'}, data
+            if [name for _, name, _, _ in fields] != ['rateLimit']:
+                self.remaining -= cost
+                self.stats['cost'] += cost
+            self.last_cost = cost
+            data = json.dumps(dict(data=resolve(self.root(), fields))).encode()
+            self.stats['bytes'] += len(data)
+        return 200, {'Content-Type': 'application/json'}, data
+
+    @property
+    def url(self) -> str:
+        assert self.httpd
+        return 'http://127.0.0.1:%d' % self.httpd.server_address[1]
+
+    def start(self, port: int = 0) -> 'FakeGithub':
+        fake = self
+
+        class handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self) -> None:
+                super().setup()
+                with fake.lock:
+                    fake.stats['connections'] += 1
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                status, headers, data = fake.handle(body)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    data = gzip.compress(data, 5)
+                    self.send_header('Content-Encoding', 'gzip')
+                with fake.lock:
+                    fake.stats['wire_bytes'] += len(data)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', port), handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+
+if __name__ == '__main__':
+    fake = FakeGithub().start(8080)
+    print("Fake Github GraphQL API listening on %s" % fake.url)
+    threading.Event().wait()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import tempfile
+import unittest
+from typing import Dict, List
+
+from yoshiki.graph import Bitmap, GraphCrawler
+from yoshiki.helpers import Query, Results
+from yoshiki.main import build_job_parser
+from yoshiki.user import User
+
+FOLLOWERS: Dict[str, List[str]] = dict(
+    toto=['titi', 'tata'], titi=['toto', 'riri'], tata=[], riri=['fifi'])
+
+
+def run_batch(queries: List[Query], size: int) -> List[Results]:
+    results: List[Results] = []
+    for query in queries:
+        assert isinstance(query, User) and query.ignore_not_found
+        results.append([
+            dict(name=login, login=login)
+            for login in FOLLOWERS.get(query.username, [])])
+    return results
+
+
+class TestGraph(unittest.TestCase):
+    def test_bitmap(self) -> None:
+        bitmap = Bitmap()
+        self.assertTrue(bitmap.add(42))
+        self.assertFalse(bitmap.add(42))
+        self.assertIn(42, bitmap)
+        self.assertNotIn(43, bitmap)
+        self.assertNotIn(100000, bitmap)
+
+    def test_crawl(self) -> None:
+        with tempfile.TemporaryDirectory() as output:
+            GraphCrawler(run_batch, output, 'followers').crawl(['toto'], 2)
+            with open(os.path.join(output, 'nodes.tsv')) as f:
+                nodes = [line.split()[1] for line in f]
+            with open(os.path.join(output, 'edges.tsv')) as f:
+                edges = [tuple(nodes[int(index)] for index in line.split()) for line in f]
+        self.assertEqual(nodes, ['toto', 'titi', 'tata', 'riri'])
+        self.assertEqual(edges, [
+            ('titi', 'toto'), ('tata', 'toto'), ('toto', 'titi'), ('riri', 'titi')])
+
+    def test_batch_size(self) -> None:
+        # Reading the frontier by 0 users never ends
+        with self.assertRaisesRegex(Exception, 'not a positive number'):
+            build_job_parser().parse_args(
+                ['crawl-graph', '--seed', 'toto', '--output', 'graph', '--batch-size', '0'])
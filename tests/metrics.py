@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import unittest
+from . fakegithub import FakeGithub
+
+import yoshiki.main
+from yoshiki.metrics import Events, Metrics
+from yoshiki.user import Followers
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self) -> None:
+        self.fake = FakeGithub(followers=150).start()
+
+    def tearDown(self) -> None:
+        self.fake.stop()
+
+    def test_metrics(self) -> None:
+        events = Events()
+        metrics = Metrics()
+        events.subscribe(metrics)
+        gql = yoshiki.main.GithubGraphQLQuery("fake-token", self.fake.url, events=events)
+        gql.run(Followers(argparse.Namespace(username='toto')))
+        text = metrics.prometheus()
+        self.assertIn('yoshiki_requests_total{kind="rateLimit",status="200"} 1', text)
+        self.assertIn('yoshiki_requests_total{kind="user",status="200"} 2', text)
+        self.assertIn('yoshiki_records_total{query="Followers"} 150', text)
+        self.assertIn('yoshiki_cost_points_total{kind="user"} 2', text)
+        self.assertIn('yoshiki_request_seconds_count{kind="user"} 2', text)
+        self.assertIn('yoshiki_request_seconds_bucket{kind="user",le="+Inf"} 2', text)
+        self.assertIn('yoshiki_transform_seconds', metrics.summary())
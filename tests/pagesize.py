@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import asyncio
+import json
+import unittest
+from typing import Any, Dict, Tuple
+from . fakegithub import FakeGithub
+
+import yoshiki.main
+from yoshiki.pagesize import PageSize
+from yoshiki.retry import RetryableError, RetryPolicy
+from yoshiki.transport import LocalTransport
+from yoshiki.user import Followers
+
+
+class TestPageSize(unittest.TestCase):
+    def test_grow(self) -> None:
+        page_size = PageSize(20)
+        page_size.observe(0.5, 1, 10000)
+        self.assertEqual(page_size.first, 31)
+        for _ in range(5):
+            page_size.observe(0.5, 1, 10000)
+        self.assertEqual(page_size.first, 100)
+
+    def test_slow(self) -> None:
+        page_size = PageSize(100, target=5)
+        page_size.observe(10, 1, 10000)
+        self.assertEqual(page_size.first, 40)
+        page_size.observe(4, 1, 10000)
+        self.assertEqual(page_size.first, 40)
+        page_size.observe(1, 1, 8 * 1024 * 1024)
+        self.assertEqual(page_size.first, 16)
+
+    def test_cost(self) -> None:
+        page_size = PageSize(50)
+        page_size.observe(0.1, 1, 1000)
+        self.assertEqual(page_size.first, 76)
+        # The larger page costs two points for 76 records
+        page_size.observe(0.1, 2, 1000)
+        self.assertEqual(page_size.first, 50)
+        page_size.observe(0.1, 1, 1000)
+        self.assertEqual(page_size.first, 50)
+
+    def test_shrink(self) -> None:
+        page_size = PageSize(40, minimum=10)
+        self.assertTrue(page_size.shrink())
+        self.assertEqual(page_size.first, 20)
+        self.assertEqual(page_size.ceiling, 30)
+        self.assertTrue(page_size.shrink())
+        self.assertFalse(page_size.shrink())
+        restored = PageSize(40)
+        restored.restore(page_size.state())
+        self.assertEqual((restored.first, restored.ceiling), (10, 15))
+
+
+class TestAdaptiveQuery(unittest.TestCase):
+    def setUp(self) -> None:
+        self.fake = FakeGithub(followers=300).start()
+
+    def tearDown(self) -> None:
+        self.fake.stop()
+
+    def test_timeout(self) -> None:
+        gql = yoshiki.main.GithubGraphQLQuery(
+            "fake-token", self.fake.url, retry=RetryPolicy(base=0.01, cap=0.01))
+        _query = gql._query
+        sizes = []
+
+        def timeout_large_pages(qdata: str, *args: Any) -> Any:
+            variables = args[3]
+            if variables and variables['first'] == 100:
+                raise RetryableError("Request timeout", 'timeout')
+            if variables:
+                sizes.append(variables['first'])
+            return _query(qdata, *args)
+        gql._query = timeout_large_pages  # type: ignore
+        followers = gql.run(Followers(argparse.Namespace(username='toto')))
+        self.assertEqual(len(followers), 300)
+        self.assertEqual(sizes[0], 50)
+        self.assertNotIn(100, sizes)
+
+    def test_timeout_async(self) -> None:
+        fake = FakeGithub(followers=300)
+        timeouts = []
+
+        def timeout_once(body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+            variables = json.loads(body).get('variables') or {}
+            if variables.get('first') == 100 and not timeouts:
+                timeouts.append(body)
+                return 200, {}, json.dumps(dict(data=None, errors=[
+                    dict(message='Timeout on validation of query')])).encode()
+            return fake.handle(body)
+        gql = yoshiki.main.AsyncGithubGraphQLQuery(
+            "fake-token", 'local', retry=RetryPolicy(base=0.01, cap=0.01),
+            transport=LocalTransport(timeout_once))
+        results = asyncio.run(gql.run_many(
+            [Followers(argparse.Namespace(username='toto'))], concurrency=1))
+        self.assertEqual(len(timeouts), 1)
+        self.assertEqual(len(results[0]), 300)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import threading
+import time
+import unittest
+from . fakegithub import FakeGithub
+from typing import Iterator
+
+import yoshiki.main
+from yoshiki.pipeline import pipeline
+from yoshiki.transport import LocalTransport
+from yoshiki.user import Followers
+
+
+def slow_source(count: int, seconds: float) -> Iterator[int]:
+    for item in range(count):
+        time.sleep(seconds)
+        yield item
+
+
+def slow_double(item: int) -> int:
+    time.sleep(0.05)
+    return item * 2
+
+
+class TestPipeline(unittest.TestCase):
+    def test_order(self) -> None:
+        self.assertEqual(
+            list(pipeline(range(100), [lambda x: x + 1, lambda x: x * 2], depth=2)),
+            [(x + 1) * 2 for x in range(100)])
+
+    def test_overlap(self) -> None:
+        start = time.monotonic()
+        self.assertEqual(list(pipeline(slow_source(6, 0.05), [slow_double])),
+                         [0, 2, 4, 6, 8, 10])
+        # One after the other the stages would take 0.6s
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_error(self) -> None:
+        def fail(item: int) -> int:
+            if item == 3:
+                raise ValueError("boom")
+            return item
+        items = pipeline(range(10), [fail])
+        self.assertEqual([next(items) for _ in range(3)], [0, 1, 2])
+        self.assertRaises(ValueError, next, items)
+
+    def test_close(self) -> None:
+        threads = threading.active_count()
+        items = pipeline(slow_source(1000, 0.01), [slow_double], depth=1)
+        self.assertEqual(next(items), 0)
+        items.close()
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_iter_states(self) -> None:
+        results = []
+        for depth in (0, 4):
+            fake = FakeGithub(followers=250)
+            gql = yoshiki.main.GithubGraphQLQuery(
+                "fake-token", 'local', transport=LocalTransport(fake.handle),
+                pipeline_depth=depth)
+            query = Followers(argparse.Namespace(username='toto'))
+            pages = list(gql.iter_states(query))
+            # The state of each page resumes the query after it
+            self.assertEqual([state['after'] for _, state in pages][-1], query.after)
+            self.assertEqual(fake.stats['requests'], 4)
+            results.append([user['login'] for page, _ in pages for user in page])
+        self.assertEqual(len(results[0]), 250)
+        self.assertEqual(results[0], results[1])
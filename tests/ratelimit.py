@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+from . utils import timestamp
+
+from yoshiki.ratelimit import SharedTokenBucket, TokenBucket, TokenPool, budget_path
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_spread(self) -> None:
+        bucket = TokenBucket(burst=2, reserve=100)
+        bucket.update(dict(remaining=3700, resetAt=timestamp(3600)))
+        now = time.time()
+        self.assertEqual(bucket.delay(1, now), 0)
+        bucket.consume(2)
+        # 3598 points left above the reserve to spend in an hour
+        self.assertAlmostEqual(bucket.delay(1, now), 1, delta=0.1)
+
+    def test_exhausted(self) -> None:
+        bucket = TokenBucket(reserve=100)
+        bucket.update(dict(remaining=100, resetAt=timestamp(600)))
+        self.assertTrue(bucket.exhausted())
+        self.assertAlmostEqual(bucket.delay(1), 601, delta=2)
+
+    def test_pending(self) -> None:
+        bucket = TokenBucket()
+        bucket.consume(1)
+        bucket.consume(1)
+        bucket.settle(1)
+        bucket.update(dict(remaining=4000, resetAt=timestamp(600)))
+        self.assertEqual(bucket.remaining, 3999)
+
+
+class TestTokenPool(unittest.TestCase):
+    def test_select(self) -> None:
+        pool = TokenPool(['a', 'b', 'c'], reserve=100)
+        pool.buckets['a'].update(dict(remaining=1000, resetAt=timestamp(600)))
+        pool.buckets['b'].update(dict(remaining=4000, resetAt=timestamp(600)))
+        pool.buckets['c'].update(dict(remaining=50, resetAt=timestamp(60)))
+        self.assertEqual(pool.select(), 'b')
+        self.assertEqual(pool.remaining, 5050)
+        pool.buckets['a'].update(dict(remaining=0, resetAt=timestamp(600)))
+        pool.buckets['b'].update(dict(remaining=0, resetAt=timestamp(600)))
+        # Every token is exhausted, c is the first one to be reset
+        self.assertEqual(pool.select(), 'c')
+
+
+def spend(path: str, spent: 'multiprocessing.Queue[int]') -> None:
+    bucket = SharedTokenBucket(path, burst=100, reserve=10)
+    count = 0
+    while not bucket.acquire(1):
+        count += 1
+    spent.put(count)
+
+
+class TestSharedTokenBucket(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = budget_path(self.tmpdir.name, 'token')
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_shared(self) -> None:
+        first = SharedTokenBucket(self.path, reserve=100)
+        second = SharedTokenBucket(self.path, reserve=100)
+        first.update(dict(remaining=1000, resetAt=timestamp(600)))
+        first.consume(10)
+        self.assertEqual(second.acquire(1), 0)
+        self.assertEqual((second.remaining, second.pending), (989, 11))
+        first.settle(10)
+        second.update(dict(remaining=990, resetAt=timestamp(600)))
+        self.assertEqual(first.delay(1), 0)
+        self.assertEqual((first.remaining, first.pending), (989, 1))
+        self.assertNotIn('token', os.listdir(self.tmpdir.name)[0])
+
+    def test_dead_process(self) -> None:
+        bucket = SharedTokenBucket(self.path)
+        bucket.update(dict(remaining=1000, resetAt=timestamp(600)))
+        with open(self.path) as f:
+            state = json.load(f)
+        state['pendings'] = {'999999999:1': 50}
+        with open(self.path, 'w') as f:
+            json.dump(state, f)
+        bucket.update(dict(remaining=1000, resetAt=timestamp(600)))
+        self.assertEqual(bucket.remaining, 1000)
+
+    def test_processes(self) -> None:
+        bucket = SharedTokenBucket(self.path, burst=100, reserve=10)
+        bucket.update(dict(remaining=50, resetAt=timestamp(600)))
+        context = multiprocessing.get_context('fork')
+        spent: 'multiprocessing.Queue[int]' = context.Queue()
+        processes = [context.Process(target=spend, args=(self.path, spent))
+                     for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        # The processes together spend the points above the reserve, no more
+        self.assertEqual(sum(spent.get() for _ in processes), 40)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import io
+import json
+import unittest
+
+from yoshiki.records import RecordBatch, RepositoryRecord, UserRecord, json_default
+
+
+def repository(name: str, stars: int) -> RepositoryRecord:
+    return RepositoryRecord(
+        name=name, owner=name.split('/')[0], default_branch='master',
+        description='desc', stars=stars, stargazers=(), forks=1, watchers=2,
+        topics=('python', 'graphql'))
+
+
+class TestRecords(unittest.TestCase):
+    def test_record(self) -> None:
+        user = UserRecord(name='Toto', login='toto')
+        self.assertEqual(user, dict(name='Toto', login='toto'))
+        self.assertEqual(user.get('login'), 'toto')
+        self.assertEqual(user.get('stars', 0), 0)
+        self.assertFalse(hasattr(user, '__dict__'))
+        self.assertEqual(
+            json.loads(json.dumps([user], default=json_default)),
+            [dict(name='Toto', login='toto')])
+
+    def test_batch(self) -> None:
+        batch = RecordBatch(RepositoryRecord)
+        batch.extend([repository('toto/tata', 42), repository('toto/titi', 43)])
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(list(batch)[1], repository('toto/titi', 43))
+        self.assertEqual(list(batch.columns['stars']), [42, 43])
+        self.assertEqual(len(batch.strings), 7)
+        output = io.StringIO()
+        batch.to_csv(output)
+        self.assertEqual(output.getvalue().splitlines()[1],
+                         'toto/tata,toto,master,desc,42,,1,2,python graphql')
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import os
+import tempfile
+import unittest
+from . fakegithub import FakeGithub
+
+import yoshiki.main
+from yoshiki.nodes import NodeTable
+from yoshiki.transport import LocalTransport
+
+
+class TestRefresh(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.names = os.path.join(self.tmpdir.name, 'names.txt')
+        self.table = os.path.join(self.tmpdir.name, 'nodes.tsv')
+        self.fake = FakeGithub(repositories=300)
+        self.gql = yoshiki.main.GithubGraphQLQuery(
+            "fake-token", 'local', transport=LocalTransport(self.fake.handle))
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def refresh(self, kind: str, names: str, fields: str) -> yoshiki.main.Refresh:
+        with open(self.names, 'w') as f:
+            f.write(names)
+        return yoshiki.main.Refresh(argparse.Namespace(
+            kind=kind, names=self.names, node_table=self.table, batch_size=100,
+            fields=fields))
+
+    def test_repositories(self) -> None:
+        names = '\n'.join('owner%d/repo%d' % (index, index) for index in range(250))
+        repos = self.gql.run(self.refresh('repository', names, 'name,stars,forks'))
+        self.assertEqual(len(repos), 250)
+        self.assertEqual(repos[42]['stars'], self.fake.stars[42])
+        self.assertEqual(repos[42]['forks'], 42)
+        # 1 rate limit, 3 look ups and 3 nodes requests
+        self.assertEqual(self.fake.stats['requests'], 7)
+        self.assertEqual(len(NodeTable(self.table)), 250)
+
+        # Known ids are read directly
+        repos = self.gql.run(self.refresh('repository', names, 'name,stars'))
+        self.assertEqual(len(repos), 250)
+        self.assertEqual(self.fake.stats['requests'], 10)
+
+    def test_users(self) -> None:
+        users = self.gql.run(self.refresh('user', 'toto\ntiti\ntoto\n', None))
+        self.assertEqual([user['login'] for user in users], ['toto', 'titi'])
+        self.assertEqual(users[0]['followers'], 100)
+
+    def test_deleted(self) -> None:
+        NodeTable(self.table).add('repository', 'owner1/gone', 'R_gone')
+        repos = self.gql.run(self.refresh('repository', 'owner1/repo1\nOWNER1/GONE\n', 'name'))
+        self.assertEqual([repo['name'] for repo in repos], ['owner1/repo1'])
+        self.assertIsNone(NodeTable(self.table).get('repository', 'owner1/gone'))
+
+    def test_batch_size(self) -> None:
+        # Batches of 0 nodes would never read the unresolved names
+        with self.assertRaisesRegex(Exception, 'not a positive number'):
+            yoshiki.main.build_job_parser().parse_args(
+                ['refresh', '--names', 'names.txt', '--batch-size', '0'])
+
+    def test_resume(self) -> None:
+        query = self.refresh('repository', 'owner1/repo1\nowner2/repo2\nowner3/repo3\n', 'name')
+        query.size = 2
+        pages = self.gql.iter_states(query)
+        # Two look ups then the first two repositories
+        self.assertEqual([next(pages)[0], next(pages)[0]], [[], []])
+        page, state = next(pages)
+        self.assertEqual(len(page), 2)
+        pages.close()
+
+        query = self.refresh('repository', 'owner1/repo1\nowner2/repo2\nowner3/repo3\n', 'name')
+        query.restore(state)
+        self.assertEqual([repo['name'] for repo in self.gql.run(query)], ['owner3/repo3'])
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import json
+import os
+import tempfile
+import unittest
+from . utils import github_mock, timestamp
+from typing import Any, Dict
+
+import yoshiki.main
+import yoshiki.repository
+
+
+def stargazer(login: str, starred_at: str) -> Dict[str, Any]:
+    return dict(starredAt=starred_at, node=dict(name=login, login=login))
+
+
+class TestIncrementalStargazers(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self.tmpdir.name, 'stargazers.ndjson')
+        with open(self.snapshot, 'w') as f:
+            f.write(json.dumps(dict(name='toto', login='toto', starred_at='2020-01-02T00:00:00Z')) + '\n')
+            f.write(json.dumps(dict(name='tata', login='tata', starred_at='2020-01-01T00:00:00Z')) + '\n')
+        self.httpd, self.thread = github_mock(list(map(json.dumps, [
+            dict(data=dict(rateLimit=dict(limit=5000, cost=1, remaining=5000, resetAt=timestamp(3600)))),
+            dict(data=dict(repository=dict(stargazers=dict(
+                pageInfo=dict(hasNextPage=True, endCursor='4242'), edges=[
+                    stargazer('titi', '2020-01-03T00:00:00Z'),
+                    stargazer('riri', '2020-01-02T00:00:00Z'),
+                    stargazer('toto', '2020-01-02T00:00:00Z'),
+                    stargazer('tata', '2020-01-01T00:00:00Z')]))))])))
+
+    def tearDown(self) -> None:
+        self.httpd.shutdown()
+        self.thread.join()
+        self.tmpdir.cleanup()
+
+    def test_incremental(self) -> None:
+        gql = yoshiki.main.GithubGraphQLQuery("fake-token", 'http://localhost:8080')
+        reqc = yoshiki.repository.Stargazers(argparse.Namespace(
+            repository='toto/tata', snapshot=self.snapshot))
+        stargazers = gql.run(reqc)
+        self.assertEqual([user['login'] for user in stargazers], ['titi', 'riri'])
+        with open(self.snapshot) as f:
+            self.assertEqual(
+                [json.loads(line)['login'] for line in f], ['toto', 'tata', 'titi', 'riri'])
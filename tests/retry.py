@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import json
+import time
+import unittest
+from . fakegithub import FakeGithub
+from . utils import timestamp
+from typing import Dict, Tuple
+
+import yoshiki.main
+from yoshiki.metrics import Events, Metrics
+from yoshiki.retry import (CircuitBreaker, FatalError, RateLimitedError, RetryableError,
+                           RetryPolicy, payload_error, status_error)
+from yoshiki.transport import LocalTransport
+from yoshiki.user import Followers
+
+
+class TestRetry(unittest.TestCase):
+    def test_policy(self) -> None:
+        policy = RetryPolicy(base=1, cap=10, jitter=lambda low, high: high)
+        self.assertEqual(policy.delay(1), 2)
+        self.assertEqual(policy.delay(3), 8)
+        self.assertEqual(policy.delay(6), 10)
+        self.assertEqual(policy.delay(6, retry_after=3), 3)
+
+    def test_classify(self) -> None:
+        self.assertIsInstance(status_error(502, {}, 'Bad gateway'), RetryableError)
+        self.assertIsInstance(status_error(401, {}, 'Bad credentials'), FatalError)
+        error = status_error(403, {'Retry-After': '5'}, 'secondary rate limit')
+        self.assertIsInstance(error, RetryableError)
+        self.assertEqual(error.retry_after, 5)  # type: ignore
+        error = status_error(
+            403, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '1600000000'}, '')
+        self.assertIsInstance(error, RateLimitedError)
+        self.assertEqual(error.reset, 1600000000)  # type: ignore
+        not_found = {'data': {'user': None}, 'errors': [{'type': 'NOT_FOUND'}]}
+        self.assertIsNone(payload_error(not_found, {}, ignore_not_found=True))
+        self.assertIsInstance(payload_error(not_found, {}), FatalError)
+        self.assertIsInstance(payload_error(
+            {'data': None, 'errors': [{'message': 'Something went wrong'}]}, {}),
+            RetryableError)
+
+    def test_rate_limited_startup(self) -> None:
+        reset = time.time() + 0.5
+        requests = []
+
+        def handle(body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+            requests.append(body)
+            if time.time() < reset:
+                return 200, {'X-RateLimit-Reset': str(reset)}, json.dumps(dict(data=None, errors=[
+                    dict(type='RATE_LIMITED', message='API rate limit exceeded')])).encode()
+            return 200, {}, json.dumps(dict(data=dict(rateLimit=dict(
+                limit=5000, cost=1, remaining=5000, resetAt=timestamp(3600))))).encode()
+        # The rate limit query waits for the reset instead of being sent again at once
+        gql = yoshiki.main.GithubGraphQLQuery(
+            "fake-token", 'local', transport=LocalTransport(handle))
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(gql.quota_remain, 5000)
+
+    def test_breaker(self) -> None:
+        breaker = CircuitBreaker(threshold=2, cooldown=10)
+        breaker.failure('url')
+        self.assertEqual(breaker.wait('url'), 0)
+        breaker.failure('url')
+        self.assertGreater(breaker.wait('url'), 0)
+        # After the cooldown a single request probes the endpoint
+        now = breaker.opened['url'] + 10
+        self.assertEqual(breaker.wait('url', now), 0)
+        self.assertGreater(breaker.wait('url', now), 0)
+        breaker.success('url')
+        self.assertEqual(breaker.wait('url'), 0)
+
+    def test_flaky_server(self) -> None:
+        fake = FakeGithub(followers=500, error_rate=0.3, secondary_rate=0.1, seed=3).start()
+        try:
+            events = Events()
+            metrics = Metrics()
+            events.subscribe(metrics)
+            gql = yoshiki.main.GithubGraphQLQuery(
+                "fake-token", fake.url, events=events,
+                retry=RetryPolicy(attempts=20, base=0.01, cap=0.05))
+            gql.breaker = CircuitBreaker(threshold=100)
+            results = gql.run(Followers(argparse.Namespace(username='toto')))
+            self.assertEqual(len(results), 500)
+            self.assertIn('yoshiki_retries_total', metrics.prometheus())
+        finally:
+            fake.stop()
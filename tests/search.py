@@ -27,24 +27,27 @@ logging.basicConfig(level=getattr(logging, 'DEBUG'))
 import argparse
 import json
 import unittest
+from . fakegithub import FakeGithub
 from . utils import github_mock, timestamp
 from typing import Any, Dict
 
 import yoshiki.main
 
 
+def mock_search(name: str, hasNext: bool) -> Dict[str, Any]:
+    return dict(data=dict(search=dict(
+        repositoryCount=26, pageInfo=dict(hasNextPage=hasNext, endCursor='4242'), edges=[
+            dict(node=dict(nameWithOwner=name,
+                           defaultBranchRef=dict(name="master"),
+                           description="desc",
+                           stargazers=dict(totalCount=42),
+                           forks=dict(totalCount=42),
+                           watchers=dict(totalCount=48),
+                           repositoryTopics=dict(edges=[])))])))
+
+
 class TestSearch(unittest.TestCase):
     def setUp(self) -> None:
-        def mock_search(name: str, hasNext: bool) -> Dict[str, Any]:
-            return dict(data=dict(search=dict(
-                repositoryCount=26, pageInfo=dict(hasNextPage=hasNext, endCursor='4242'), edges=[
-                    dict(node=dict(nameWithOwner=name,
-                                   defaultBranchRef=dict(name="master"),
-                                   description="desc",
-                                   stargazers=dict(totalCount=42),
-                                   forks=dict(totalCount=42),
-                                   watchers=dict(totalCount=48),
-                                   repositoryTopics=dict(edges=[])))])))
         self.httpd, self.thread = github_mock(list(map(json.dumps, [
             dict(data=dict(rateLimit=dict(limit=5000, cost=1, remaining=5000, resetAt=timestamp(3600)))),
             mock_search('toto/tata', True), mock_search('titi/riri', False)])))
@@ -59,3 +62,66 @@ class TestSearch(unittest.TestCase):
         repos = gql.run(reqc)
         print(repos)
         self.assertEqual(len(repos), 2)
+
+    def test_iter_results(self) -> None:
+        gql = yoshiki.main.GithubGraphQLQuery("fake-token", 'http://localhost:8080')
+        reqc = yoshiki.main.SearchProjects(argparse.Namespace(stars=42, terms=''))
+        pages = gql.iter_pages(reqc)
+        self.assertEqual([repo['name'] for repo in next(pages)], ['toto/tata'])
+        self.assertEqual([repo['name'] for repo in next(pages)], ['titi/riri'])
+        self.assertEqual(list(pages), [])
+
+
+class TestShardedSearch(unittest.TestCase):
+    def setUp(self) -> None:
+        top = dict(edges=[dict(node=dict(stargazers=dict(totalCount=5000)))])
+        self.httpd, self.thread = github_mock(list(map(json.dumps, [
+            dict(data=dict(rateLimit=dict(limit=5000, cost=1, remaining=5000, resetAt=timestamp(3600)))),
+            dict(data=dict(top=top, p0=dict(repositoryCount=1500))),
+            dict(data=dict(p0=dict(repositoryCount=800), p1=dict(repositoryCount=700))),
+            dict(data=dict(s0=mock_search('toto/tata', False)['data']['search'],
+                           s1=mock_search('toto/tata', True)['data']['search'])),
+            dict(data=dict(s0=mock_search('titi/riri', False)['data']['search']))])))
+
+    def tearDown(self) -> None:
+        self.httpd.shutdown()
+        self.thread.join()
+
+    def test_sharded_search(self) -> None:
+        gql = yoshiki.main.GithubGraphQLQuery("fake-token", 'http://localhost:8080')
+        reqc = yoshiki.main.SearchProjects.from_args(argparse.Namespace(
+            stars=42, terms='', shard=True, batch_size=10))
+        assert isinstance(reqc, yoshiki.main.ShardedSearchProjects)
+        with self.assertLogs('yoshiki.Dedup', 'INFO'):
+            repos = gql.run(reqc)
+        self.assertEqual([repo['name'] for repo in repos], ['toto/tata', 'titi/riri'])
+        self.assertEqual(reqc.dedup.duplicates, 1)
+
+
+class TestFakeGithubSearch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.fake = FakeGithub(repositories=100, max_stars=1000).start()
+
+    def tearDown(self) -> None:
+        self.fake.stop()
+
+    def test_search(self) -> None:
+        gql = yoshiki.main.GithubGraphQLQuery("fake-token", self.fake.url)
+        reqc = yoshiki.main.SearchProjects(argparse.Namespace(stars=self.fake.stars[39], terms=''))
+        repos = gql.run(reqc)
+        self.assertEqual(len(repos), 60)
+        self.assertEqual(repos[0]['stars'], 1000)
+        self.assertEqual(self.fake.stats['requests'], 3)
+        self.assertEqual(gql.quota_remain, 5000 - self.fake.stats['cost'])
+
+    def test_sharded_quoted_terms(self) -> None:
+        gql = yoshiki.main.GithubGraphQLQuery("fake-token", self.fake.url)
+        reqc = yoshiki.main.SearchProjects.from_args(argparse.Namespace(
+            stars=self.fake.stars[39], terms='"machine learning"', shard=True))
+        self.assertEqual(len(gql.run(reqc)), 60)
+
+    def test_shard_batch_size(self) -> None:
+        # No probe would ever be sent
+        with self.assertRaisesRegex(Exception, 'not a positive number'):
+            yoshiki.main.build_job_parser().parse_args(
+                ['search-projects', '--shard', '--batch-size', '0'])
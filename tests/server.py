@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from . fakegithub import FakeGithub
+
+import yoshiki.main
+from yoshiki.client import submit
+from yoshiki.server import Server
+from yoshiki.transport import LocalTransport
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.socket = os.path.join(self.tmpdir.name, 'yoshiki.sock')
+        self.fake = FakeGithub(followers=250)
+        gql = yoshiki.main.GithubGraphQLQuery(
+            "fake-token", 'local', transport=LocalTransport(self.fake.handle))
+        self.server = Server(gql, yoshiki.main.build_job_parser(), yoshiki.main.output)
+        self.thread = threading.Thread(target=self.server.serve, args=(self.socket,), daemon=True)
+        self.thread.start()
+        while not os.path.exists(self.socket):
+            time.sleep(0.01)
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        self.thread.join()
+        self.tmpdir.cleanup()
+
+    def submit(self, *argv: str) -> str:
+        out = io.BytesIO()
+        err = io.StringIO()
+        self.status = submit(list(argv), self.socket, out, err)
+        self.error = err.getvalue()
+        return out.getvalue().decode()
+
+    def test_jobs(self) -> None:
+        lines = self.submit('--ndjson', 'list-followers', '--username', 'toto').splitlines()
+        self.assertEqual(self.status, 0)
+        self.assertEqual(len(lines), 250)
+        self.assertEqual(json.loads(lines[0])['login'], 'toto-follower0')
+        followers = json.loads(self.submit('--json', 'list-following', '--username', 'titi'))
+        self.assertEqual(len(followers), 100)
+        # The rate limit was read once, when the daemon started
+        self.assertEqual(self.fake.stats['requests'], 1 + 3 + 1)
+        self.assertEqual(self.server.jobs, 2)
+
+    def test_errors(self) -> None:
+        self.assertEqual(self.submit('list-followers'), '')
+        self.assertEqual(self.status, 1)
+        self.assertIn('--username', self.error)
+        self.submit('serve')
+        self.assertEqual(self.status, 1)
+        # The daemon options are refused, not silently ignored
+        self.submit('--token', 'other', 'list-followers', '--username', 'toto')
+        self.assertEqual(self.status, 1)
+        self.assertIn('--token is a daemon option', self.error)
+        self.submit('--stats', '--json', 'list-followers', '--username', 'toto')
+        self.assertIn('--stats is a daemon option', self.error)
+        # The daemon does not read the standard input of the client
+        self.submit('refresh', '--names', '-')
+        self.assertIn('--names - would read the standard input', self.error)
+        self.submit('--help')
+        self.assertEqual(self.status, 1)
+        self.assertIn('list-followers', self.error)
+        # The daemon still serves
+        self.assertEqual(len(json.loads(
+            self.submit('--json', 'list-following', '--username', 'titi'))), 100)
+
+    def test_paths(self) -> None:
+        # Relative paths are resolved in the directory of the client
+        args = self.server.parser.parse_job(
+            ['--resume', 'job', 'list-stargazers', '--repository', 'toto/tata',
+             '--snapshot', 'snap.ndjson'], '/client')
+        self.assertEqual(args.snapshot, '/client/snap.ndjson')
+        self.assertEqual(args.checkpoint_dir, os.path.expanduser('~/.cache/yoshiki/jobs'))
+        args = self.server.parser.parse_job(
+            ['crawl-graph', '--seed', 'toto', '--output', '/graph'], '/client')
+        self.assertEqual(args.output, '/graph')
+
+    def test_thin_client(self) -> None:
+        # The client does not import requests nor the queries
+        modules = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys, yoshiki.client; print(" ".join(sorted(sys.modules)))']).decode().split()
+        self.assertNotIn('requests', modules)
+        self.assertNotIn('yoshiki.main', modules)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import os
+import random
+import unittest
+from . fakegithub import FakeGithub
+from typing import Any, Dict, List
+
+import yoshiki.main
+from yoshiki.sorting import ExternalSort, TopK, rank
+from yoshiki.transport import LocalTransport
+
+
+def records(count: int) -> List[Dict[str, Any]]:
+    generator = random.Random(42)
+    return [dict(name='repo%d' % index, stars=generator.randint(0, 20))
+            for index in range(count)]
+
+
+def stars(result: Any) -> int:
+    return int(result['stars'])
+
+
+class TestSorting(unittest.TestCase):
+    def test_top_k(self) -> None:
+        results = records(1000)
+        heap = TopK(10, stars)
+        heap.extend(results)
+        # Ties keep the order of the records like a stable sort
+        self.assertEqual(heap.results(), sorted(results, key=stars, reverse=True)[:10])
+        self.assertEqual(len(heap.heap), 10)
+        heap = TopK(0, stars)
+        heap.extend(results)
+        self.assertEqual(heap.results(), [])
+
+    def test_external_sort(self) -> None:
+        results = records(1000)
+        runs = ExternalSort(stars, reverse=True, buffer=64)
+        runs.extend(results)
+        self.assertEqual(len(runs.runs), 15)
+        assert runs.tmpdir
+        directory = runs.tmpdir.name
+        self.assertEqual(list(runs), sorted(results, key=stars, reverse=True))
+        self.assertFalse(os.path.exists(directory))
+
+    def test_rank(self) -> None:
+        pages = [records(100)[index:index + 10] for index in range(0, 100, 10)]
+        expected = sorted(records(100), key=stars, reverse=True)
+        self.assertEqual(list(rank(pages, stars)), expected)
+        self.assertEqual(list(rank(pages, stars, buffer=8)), expected)
+        self.assertEqual(list(rank(pages, stars, top=5)), expected[:5])
+
+    def test_search_top(self) -> None:
+        fake = FakeGithub(repositories=300)
+        gql = yoshiki.main.GithubGraphQLQuery(
+            "fake-token", 'local', transport=LocalTransport(fake.handle))
+        repos = gql.run(yoshiki.main.SearchProjects(argparse.Namespace(
+            stars=0, terms='', top_k=3, sort_buffer=None)))
+        self.assertEqual([repo['stars'] for repo in repos],
+                         sorted(fake.stars, reverse=True)[:3])
+        parser = yoshiki.main.build_job_parser()
+        with self.assertRaisesRegex(Exception, 'not a positive number'):
+            parser.parse_args(['search-projects', '--top', '0'])
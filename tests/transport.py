@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import asyncio
+import unittest
+from . fakegithub import FakeGithub
+
+import yoshiki.main
+from yoshiki.transport import LocalTransport, RequestsTransport, get_transport
+from yoshiki.user import Followers
+
+
+class TestTransport(unittest.TestCase):
+    def test_local(self) -> None:
+        fake = FakeGithub(followers=250)
+        gql = yoshiki.main.GithubGraphQLQuery(
+            "fake-token", 'local', transport=LocalTransport(fake.handle))
+        followers = gql.run(Followers(argparse.Namespace(username='toto')))
+        self.assertEqual(len(followers), 250)
+        self.assertEqual(fake.stats['requests'], 4)
+
+    def test_gzip_keep_alive(self) -> None:
+        fake = FakeGithub(followers=500).start()
+        try:
+            gql = yoshiki.main.AsyncGithubGraphQLQuery(
+                "fake-token", fake.url, transport=RequestsTransport(pool_size=2))
+            results = asyncio.run(gql.run_many(
+                [Followers(argparse.Namespace(username='user%d' % i)) for i in range(4)],
+                concurrency=2))
+            self.assertEqual([len(followers) for followers in results], [500] * 4)
+            self.assertLess(fake.stats['wire_bytes'] * 5, fake.stats['bytes'])
+            self.assertLessEqual(fake.stats['connections'], 2)
+        finally:
+            fake.stop()
+
+    def test_get_transport(self) -> None:
+        self.assertIsInstance(get_transport('requests', 4), RequestsTransport)
+        self.assertRaises(Exception, get_transport, 'ftp')
@@ -0,0 +1,157 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import gzip
+import hashlib
+import importlib
+import json
+import logging
+import os
+import re
+from threading import Lock
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from . helpers import query_kind
+
+
+STRING = re.compile(r'"(?:[^"\\]|\\.)*"')
+TOKEN = re.compile(r'(?:\w+\s*:\s*)?(\w+)\s*(\([^)]*\))?|[{}]')
+
+
+def signature(document: str) -> str:
+    # The fields of a document with arguments, outside of the edges and nodes
+    # selections: they choose the pages while the fields read in the nodes
+    # only project them
+    strings: List[str] = []
+
+    def hide(match: 're.Match[str]') -> str:
+        strings.append(match.group(0))
+        return '"%d"' % (len(strings) - 1)
+    text = STRING.sub(hide, document)
+    parts: List[str] = []
+    depth = 0
+    skip: Optional[int] = None
+    last = None
+    for match in TOKEN.finditer(text):
+        if match.group(0) == '{':
+            depth += 1
+            if skip is None and last in ('edges', 'nodes'):
+                skip = depth
+        elif match.group(0) == '}':
+            if skip == depth:
+                skip = None
+            depth -= 1
+        else:
+            last = match.group(1)
+            if skip is None and match.group(2):
+                parts.append(re.sub(r'\s+', ' ', match.group(0)))
+    return re.sub(r'"(\d+)"', lambda match: strings[int(match.group(1))], '\n'.join(parts))
+
+
+class Archive(object):
+    # Append only archive of raw response pages. Each page is a compressed
+    # member (gzip, or zstd for .zst paths) holding a json header line and the
+    # response body, and the path.idx file maps page keys to members.
+    log = logging.getLogger("yoshiki.Archive")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = Lock()
+        self.compress: Callable[[bytes], bytes] = gzip.compress
+        self.decompress: Callable[[bytes], bytes] = gzip.decompress
+        if path.endswith('.zst'):
+            try:
+                zstandard = importlib.import_module('zstandard')
+            except ImportError:
+                raise Exception("zstandard is required by .zst archives")
+            self.compress = zstandard.ZstdCompressor().compress
+            self.decompress = zstandard.ZstdDecompressor().decompress
+        self.index: Dict[str, Tuple[int, int]] = {}
+        if os.path.exists(self.path + '.idx'):
+            with open(self.path + '.idx') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self.index[entry['key']] = (entry['offset'], entry['length'])
+        self.data: Optional[BinaryIO] = None
+        self.entries: Optional[TextIO] = None
+
+    @staticmethod
+    def key(document: str, variables: Optional[Dict[str, Any]] = None) -> str:
+        # Pages are found by kind, arguments and cursor whatever their size
+        # and the fields read
+        variables = dict((name, value) for name, value in (variables or {}).items()
+                         if name != 'first' and not name.endswith('_first'))
+        return hashlib.sha256(('%s\0%s\0%s' % (
+            query_kind(document), signature(document),
+            json.dumps(variables, sort_keys=True))).encode()).hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def append(self, document: str, variables: Optional[Dict[str, Any]],
+               content: bytes) -> None:
+        key = self.key(document, variables)
+        header = json.dumps(dict(
+            key=key, kind=query_kind(document), document=document,
+            variables=variables or {})).encode()
+        member = self.compress(header + b'\n' + content)
+        with self.lock:
+            if self.data is None or self.entries is None:
+                self.data = open(self.path, 'ab')
+                self.entries = open(self.path + '.idx', 'a')
+            data, entries = self.data, self.entries
+            offset = data.seek(0, os.SEEK_END)
+            data.write(member)
+            data.flush()
+            # The member is written before it is indexed
+            entries.write(json.dumps(dict(
+                key=key, kind=query_kind(document),
+                after=(variables or {}).get('after'), offset=offset,
+                length=len(member))) + '\n')
+            entries.flush()
+            self.index[key] = (offset, len(member))
+
+    def read(self, offset: int, length: int) -> Tuple[Dict[str, Any], bytes]:
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            header, content = self.decompress(f.read(length)).split(b'\n', 1)
+        return json.loads(header), content
+
+    def get(self, document: str, variables: Optional[Dict[str, Any]] = None) -> bytes:
+        key = self.key(document, variables)
+        if key not in self.index:
+            raise Exception("Page not in the archive %s see: %s %s" % (
+                self.path, document, json.dumps(variables)))
+        return self.read(*self.index[key])[1]
+
+    def __iter__(self) -> Iterator[Tuple[Dict[str, Any], bytes]]:
+        for offset, length in sorted(self.index.values()):
+            yield self.read(offset, length)
+
+    def close(self) -> None:
+        with self.lock:
+            if self.data is not None and self.entries is not None:
+                self.data.close()
+                self.entries.close()
+            self.data = self.entries = None
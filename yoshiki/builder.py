@@ -0,0 +1,122 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import re
+import textwrap
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+from . records import Record, record_type
+
+# A field of a record: its selection on the GraphQL node and a function
+# reading its value from the node
+Extract = Callable[[Dict[str, Any]], Any]
+Field = Tuple[str, Extract]
+
+# The cursor and page size of paginated queries are passed as variables
+PAGE_VARIABLES = {'first': 'Int!', 'after': 'String'}
+
+
+def compile_query(body: str, variables: Optional[Dict[str, str]] = None) -> str:
+    body = textwrap.dedent(body).strip()
+    if not variables:
+        return body + '\n'
+    return 'query(%s) %s\n' % (
+        ', '.join('$%s: %s' % item for item in variables.items()), body)
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    if not value:
+        return None
+    return [field.strip() for field in value.split(',') if field.strip()]
+
+
+class Projection(object):
+    # The fields selected among the ones a query can read, compiled in a
+    # selection set and in the record type holding them
+    def __init__(self, fields: Dict[str, Field], selected: Optional[Sequence[str]] = None,
+                 record: Optional[Type[Record]] = None) -> None:
+        names = tuple(selected or fields)
+        unknown = [name for name in names if name not in fields]
+        if unknown:
+            raise Exception("Unknown fields %s, available fields are: %s" % (
+                ','.join(unknown), ','.join(fields)))
+        self.names = names
+        self.extracts = [(name, fields[name][1]) for name in names]
+        selections: List[str] = []
+        for name in names:
+            if fields[name][0] and fields[name][0] not in selections:
+                selections.append(fields[name][0])
+        self.selection = '\n'.join(selections)
+        if record is not None and record.__slots__ == names:
+            self.record = record
+        else:
+            self.record = record_type(record.__name__ if record else 'Record', names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names
+
+    def extract(self, node: Dict[str, Any]) -> Record:
+        return self.record(**dict((name, extract(node)) for name, extract in self.extracts))
+
+
+# Variables and strings of a document, the latter are left unchanged
+VARIABLE = re.compile(r'"(?:[^"\\]|\\.)*"|\$(\w+)')
+OPERATION = re.compile(r'\s*(?:query\b\s*\w*\s*(?:\(([^)]*)\))?\s*)?{', re.S)
+
+
+class Batch(object):
+    # Merge graph queries in one document, each one under an alias and with
+    # its variables renamed after the alias
+    def __init__(self) -> None:
+        self.selections: List[str] = []
+        self.definitions: List[str] = []
+        self.variables: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.selections)
+
+    def add(self, alias: str, graph_query: str,
+            variables: Optional[Dict[str, Any]] = None) -> str:
+        operation = OPERATION.match(graph_query)
+        selection = graph_query.strip()
+        if not operation or not selection.endswith('}'):
+            raise Exception("Can not alias graph query: %s" % graph_query)
+        selection = selection[len(operation.group(0).strip()):-1].strip()
+        root = re.match(r'\w+', selection)
+        if not root:
+            raise Exception("No root field in graph query: %s" % graph_query)
+
+        def rename(match: 're.Match[str]') -> str:
+            if not match.group(1):
+                return match.group(0)
+            return '$%s_%s' % (alias, match.group(1))
+        self.selections.append('%s: %s' % (alias, VARIABLE.sub(rename, selection)))
+        if operation.group(1):
+            self.definitions.append(VARIABLE.sub(rename, operation.group(1)))
+        for name, value in (variables or {}).items():
+            self.variables['%s_%s' % (alias, name)] = value
+        return root.group(0)
+
+    def document(self) -> str:
+        body = '{\n%s\n}' % '\n'.join(self.selections)
+        if not self.definitions:
+            return body
+        return 'query(%s) %s' % (', '.join(self.definitions), body)
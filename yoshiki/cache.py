@@ -0,0 +1,124 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from . helpers import Raw, query_kind
+
+
+class ResponseCache(object):
+    log = logging.getLogger("yoshiki.ResponseCache")
+
+    def __init__(self, path: str, ttl: float = 3600,
+                 ttls: Optional[Dict[str, float]] = None,
+                 max_size: int = 512 * 1024 * 1024) -> None:
+        os.makedirs(path, exist_ok=True)
+        # Default time to live and per kind (document root field) overrides
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.max_size = max_size
+        self.lock = Lock()
+        self.db = sqlite3.connect(
+            os.path.join(path, 'cache.sqlite'), check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, kind TEXT, body TEXT, size INTEGER, "
+            "created REAL, accessed REAL)")
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed "
+            "ON responses (accessed)")
+        self.db.commit()
+
+    @staticmethod
+    def key(url: str, qdata: str, variables: Optional[Dict[str, Any]] = None) -> str:
+        key = '%s\0%s' % (url, qdata)
+        # The page size adapts from run to run, a page is found by its cursor
+        variables = dict((name, value) for name, value in (variables or {}).items()
+                         if name != 'first' and not name.endswith('_first'))
+        if variables:
+            key += '\0' + json.dumps(variables, sort_keys=True)
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def ttl_for(self, kind: str) -> float:
+        if kind == 'rateLimit':
+            return 0
+        return self.ttls.get(kind, self.ttl)
+
+    def get(self, url: str, qdata: str,
+            variables: Optional[Dict[str, Any]] = None) -> Optional[Raw]:
+        key = self.key(url, qdata, variables)
+        now = time.time()
+        with self.lock:
+            row = self.db.execute(
+                "SELECT kind, body, created FROM responses WHERE key = ?",
+                (key,)).fetchone()
+            if not row:
+                return None
+            kind, body, created = row
+            if now - created > self.ttl_for(kind):
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.db.commit()
+                return None
+            self.db.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.db.commit()
+        self.log.debug("Cache hit for %s query %s" % (kind, key))
+        ret = json.loads(body)
+        if not isinstance(ret, dict):
+            raise Exception("Cached result is not a dict: %s" % ret)
+        return ret
+
+    def put(self, url: str, qdata: str, ret: Raw,
+            variables: Optional[Dict[str, Any]] = None) -> None:
+        kind = query_kind(qdata)
+        if self.ttl_for(kind) <= 0:
+            return
+        body = json.dumps(ret)
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (self.key(url, qdata, variables), kind, body, len(body), now, now))
+            self.evict()
+            self.db.commit()
+
+    def evict(self) -> None:
+        size = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if size <= self.max_size:
+            return
+        evicted: List[str] = []
+        for key, entry_size in self.db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed"):
+            if size <= self.max_size:
+                break
+            evicted.append(key)
+            size -= entry_size
+        self.db.executemany(
+            "DELETE FROM responses WHERE key = ?", [(key,) for key in evicted])
+        self.log.info("Evicted %s responses from the cache" % len(evicted))
@@ -0,0 +1,108 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+from . helpers import Query, Results
+from . records import json_default
+
+
+class Checkpoint(object):
+    log = logging.getLogger("yoshiki.Checkpoint")
+
+    def __init__(self, path: str, job: str) -> None:
+        self.job = job
+        self.directory = os.path.join(os.path.expanduser(path), job)
+        os.makedirs(self.directory, exist_ok=True)
+        self.state_path = os.path.join(self.directory, 'state.json')
+        self.results_path = os.path.join(self.directory, 'results.ndjson')
+        self.journal_path = os.path.join(self.directory, 'journal.ndjson')
+        self.state: Dict[str, Any] = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                self.state = json.load(f)
+
+    def restore(self, query: Query) -> None:
+        query.start_journal()
+        if self.state and self.state['kind'] != type(query).__name__:
+            raise Exception("Job %s is a %s query, not a %s query" % (
+                self.job, self.state['kind'], type(query).__name__))
+        # Drop results and journal entries written after the last committed
+        # page, all of them when the first page was never committed
+        with open(self.results_path, 'ab') as f:
+            f.truncate(self.state.get('offset', 0))
+        with open(self.journal_path, 'ab') as f:
+            f.truncate(self.state.get('journal_offset', 0))
+        if not self.state:
+            return
+        with open(self.journal_path, 'rb') as f:
+            journal = [json.loads(line) for line in f]
+        query.restore(dict(self.state['query'], journal=journal))
+        self.log.info("Resuming job %s from %s" % (self.job, self.state['query']))
+
+    def commit(self, query: Query, state: Dict[str, Any], page: Results) -> None:
+        state = dict(state)
+        journal = state.pop('journal', [])
+        with open(self.journal_path, 'ab') as f:
+            if journal:
+                f.write(''.join(json.dumps(entry) + '\n' for entry in journal).encode())
+                f.flush()
+                os.fsync(f.fileno())
+            journal_offset = f.tell()
+        with open(self.results_path, 'ab') as f:
+            for result in page:
+                f.write((json.dumps(result, default=json_default) + '\n').encode())
+            f.flush()
+            os.fsync(f.fileno())
+            offset = f.tell()
+        self.state = dict(
+            kind=type(query).__name__, query=state, offset=offset,
+            journal_offset=journal_offset)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def results(self, chunk: int = 1000) -> Iterator[Results]:
+        if not self.state:
+            return
+        page: Results = []
+        with open(self.results_path, 'rb') as f:
+            while f.tell() < self.state['offset']:
+                page.append(json.loads(f.readline()))
+                if len(page) == chunk:
+                    yield page
+                    page = []
+        if page:
+            yield page
+
+    def iter_pages(self, iter_states: Callable[[Query], Iterator[Tuple[Results, Dict[str, Any]]]],
+                   query: Query) -> Iterator[Results]:
+        self.restore(query)
+        yield from self.results()
+        # The query may already be fetching the next pages, commit the state
+        # it had after each page
+        for page, state in iter_states(query):
+            self.commit(query, state, page)
+            yield page
@@ -0,0 +1,101 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Submit jobs to a yoshiki serve daemon. This module only imports the
+# standard library so that a job starts in milliseconds.
+import json
+import os
+import socket
+import struct
+import sys
+from typing import BinaryIO, List, Optional, TextIO, Tuple
+
+# Frames sent by the daemon: a kind, the payload size and the payload
+HEADER = struct.Struct('>cI')
+OUTPUT = b'o'
+EXIT = b'x'
+
+
+def default_socket() -> str:
+    return os.environ.get('YOSHIKI_SOCKET') or os.path.join(
+        os.environ.get('XDG_RUNTIME_DIR') or os.path.expanduser('~/.cache/yoshiki'),
+        'yoshiki.sock')
+
+
+def write_frame(sock: socket.socket, kind: bytes, payload: bytes) -> None:
+    sock.sendall(HEADER.pack(kind, len(payload)) + payload)
+
+
+def read_frame(f: BinaryIO) -> Optional[Tuple[bytes, bytes]]:
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    kind, size = HEADER.unpack(header)
+    payload = f.read(size)
+    if len(payload) < size:
+        return None
+    return kind, payload
+
+
+def submit(argv: List[str], path: Optional[str] = None,
+           out: Optional[BinaryIO] = None, err: Optional[TextIO] = None) -> int:
+    # Run the yoshiki command line arguments in the daemon, stream its output
+    # and return its exit status
+    out = out or sys.stdout.buffer
+    err = err or sys.stderr
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path or default_socket())
+        # Relative paths are resolved in the directory of the client
+        sock.sendall(json.dumps(dict(argv=argv, cwd=os.getcwd())).encode() + b'\n')
+        with sock.makefile('rb') as f:
+            while True:
+                frame = read_frame(f)
+                if frame is None:
+                    raise Exception("Connection closed by the daemon")
+                kind, payload = frame
+                if kind == OUTPUT:
+                    out.write(payload)
+                    out.flush()
+                elif kind == EXIT:
+                    status = json.loads(payload)
+                    if status.get('error'):
+                        err.write('yoshiki: %s\n' % status['error'])
+                    return int(status['status'])
+
+
+def main() -> None:
+    argv = sys.argv[1:]
+    path = None
+    if argv[:1] == ['--socket']:
+        path, argv = argv[1], argv[2:]
+    try:
+        status = submit(argv, path)
+    except OSError as e:
+        sys.stderr.write("yoshiki: can not reach the daemon (%s), is yoshiki serve running?\n" % e)
+        status = 2
+    except Exception as e:
+        sys.stderr.write("yoshiki: %s\n" % e)
+        status = 1
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import importlib
+import json
+import json.decoder
+import re
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+Decoder = Callable[[bytes], Any]
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+DECODER = json.JSONDecoder()
+
+
+def skip(text: str, index: int) -> int:
+    return WHITESPACE.match(text, index).end()  # type: ignore
+
+
+def json_loads(content: bytes) -> Any:
+    # Decode the bytes directly instead of building the response text first
+    return json.loads(content)
+
+
+def get_decoder(name: str = 'auto') -> Decoder:
+    if name in ('auto', 'orjson'):
+        try:
+            orjson = importlib.import_module('orjson')
+        except ImportError:
+            if name == 'orjson':
+                raise Exception("orjson is required by the orjson json decoder")
+            return json_loads
+        loads: Decoder = orjson.loads
+        return loads
+    if name == 'json':
+        return json_loads
+    raise Exception("Unknown json decoder %s" % name)
+
+
+class Edges(object):
+    # The items of an edges array decoded one at a time while they are read,
+    # only closing brackets may follow the array in the document
+    def __init__(self, text: str, index: int) -> None:
+        self.text: Optional[str] = text
+        self.index = index
+
+    def __iter__(self) -> Iterator[Any]:
+        text, index = self.text, self.index
+        if text is None:
+            raise Exception("Streamed edges can only be read once")
+        self.text = None
+        index = skip(text, index)
+        if text[index] != ']':
+            while True:
+                edge, index = DECODER.raw_decode(text, index)
+                yield edge
+                index = skip(text, index)
+                if text[index] == ']':
+                    break
+                if text[index] != ',':
+                    raise Exception("Malformed edges at %s" % index)
+                index = skip(text, index + 1)
+        if text[index + 1:].strip(' \t\n\r}'):
+            raise Exception("Streamed edges are not the last value of the response")
+
+
+def decode_object(text: str, index: int) -> Tuple[Dict[str, Any], Optional[int]]:
+    # Decode the object at index, return None as end index once an edges
+    # array is found: the rest of the document is read through Edges
+    obj: Dict[str, Any] = {}
+    index = skip(text, index + 1)
+    if text[index] == '}':
+        return obj, index + 1
+    while True:
+        key, index = json.decoder.scanstring(text, index + 1)  # type: ignore
+        index = skip(text, index)
+        if text[index] != ':':
+            raise Exception("Malformed object at %s" % index)
+        index = skip(text, index + 1)
+        end: Optional[int]
+        if text[index] == '{':
+            obj[key], end = decode_object(text, index)
+            if end is None:
+                return obj, None
+        elif key == 'edges' and text[index] == '[':
+            obj[key] = Edges(text, index + 1)
+            return obj, None
+        else:
+            obj[key], end = DECODER.raw_decode(text, index)
+        index = skip(text, end)
+        if text[index] == '}':
+            return obj, index + 1
+        if text[index] != ',':
+            raise Exception("Malformed object at %s" % index)
+        index = skip(text, index + 1)
+
+
+def stream_loads(content: bytes) -> Any:
+    # Decode the nodes of the first edges array lazily, a page is then never
+    # held as a whole tree. Errors may follow the data, decode them at once.
+    text = content.decode('utf-8')
+    index = skip(text, 0)
+    if text[index:index + 1] != '{' or '"errors"' in text:
+        return json.loads(text)
+    return decode_object(text, index)[0]
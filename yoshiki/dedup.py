@@ -0,0 +1,124 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import hashlib
+import logging
+import math
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Set, TypeVar
+
+T = TypeVar('T')
+
+
+class Keys(ABC):
+    @abstractmethod
+    def add(self, key: str) -> bool:
+        # Add the key, False when it was already there
+        ...
+
+
+class ExactKeys(Keys):
+    def __init__(self) -> None:
+        self.keys: Set[str] = set()
+
+    def add(self, key: str) -> bool:
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        return True
+
+
+class BloomFilter(Keys):
+    # Fixed size set of hashed keys: a new key is taken for a known one with
+    # the error_rate probability once capacity keys were added, known keys
+    # are always found
+    def __init__(self, capacity: int = 1000000, error_rate: float = 0.001) -> None:
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+
+    def add(self, key: str) -> bool:
+        new = False
+        for position in self.positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                new = True
+        return new
+
+
+class Dedup(object):
+    log = logging.getLogger("yoshiki.Dedup")
+
+    def __init__(self, mode: str = 'exact', capacity: int = 1000000,
+                 error_rate: float = 0.001) -> None:
+        self.keys: Keys
+        if mode == 'exact':
+            self.keys = ExactKeys()
+        elif mode == 'bloom':
+            self.keys = BloomFilter(capacity, error_rate)
+        else:
+            raise Exception("Unknown de-duplication mode %s" % mode)
+        self.duplicates = 0
+        # Keys added since the last journal call, when journaling
+        self.journaling = False
+        self.added: List[str] = []
+
+    def filter(self, items: Iterable[T], key: Callable[[T], str]) -> List[T]:
+        kept: List[T] = []
+        for item in items:
+            item_key = key(item)
+            if self.keys.add(item_key):
+                kept.append(item)
+                if self.journaling:
+                    self.added.append(item_key)
+            else:
+                self.duplicates += 1
+        return kept
+
+    def report(self) -> None:
+        if self.duplicates:
+            self.log.info("%s duplicated records dropped" % self.duplicates)
+
+    # The keys are saved incrementally: journal returns the keys added since
+    # its last call and replay adds them back
+    def start_journal(self) -> None:
+        self.journaling = True
+
+    def journal(self) -> List[str]:
+        added, self.added = self.added, []
+        return added
+
+    def replay(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.keys.add(key)
+
+    def state(self) -> Dict[str, Any]:
+        return dict(duplicates=self.duplicates)
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        self.duplicates = state['duplicates']
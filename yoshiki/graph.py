@@ -0,0 +1,161 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import logging
+import os
+from array import array
+from typing import BinaryIO, Callable, Dict, Iterator, List, TextIO
+
+from . helpers import Query, Results, positive
+from . user import Followers, Following, User
+
+
+class Bitmap(object):
+    def __init__(self) -> None:
+        self.bits = bytearray()
+
+    def add(self, index: int) -> bool:
+        byte, bit = divmod(index, 8)
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(max(byte + 1 - len(self.bits), 4096)))
+        if self.bits[byte] & (1 << bit):
+            return False
+        self.bits[byte] |= 1 << bit
+        return True
+
+    def __contains__(self, index: int) -> bool:
+        byte, bit = divmod(index, 8)
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << bit))
+
+
+class Interner(object):
+    # Map logins to dense integer ids, the table is also written to disk
+    def __init__(self, nodes: TextIO) -> None:
+        self.ids: Dict[str, int] = {}
+        self.logins: List[str] = []
+        self.nodes = nodes
+
+    def intern(self, login: str) -> int:
+        index = self.ids.get(login)
+        if index is None:
+            index = self.ids[login] = len(self.logins)
+            self.logins.append(login)
+            self.nodes.write('%d\t%s\n' % (index, login))
+        return index
+
+
+class GraphCrawler(object):
+    log = logging.getLogger("yoshiki.GraphCrawler")
+
+    @staticmethod
+    def sub_parser(parser: argparse._SubParsersAction) -> None:
+        sub = parser.add_parser("crawl-graph")
+        sub.set_defaults(command=GraphCrawler.run)
+        sub.add_argument(
+            '--seed', action='append', required=True,
+            help='The user name to start from (can be repeated)')
+        sub.add_argument(
+            '--depth', type=int, default=1, help='The number of hops')
+        sub.add_argument(
+            '--direction', choices=['followers', 'following', 'both'],
+            default='both', help='The edges to follow')
+        sub.add_argument(
+            '--output', required=True,
+            help='Directory for the nodes.tsv, edges.tsv and frontier files')
+        sub.add_argument(
+            '--batch-size', type=positive, default=20,
+            help='Number of users expanded per request')
+
+    @staticmethod
+    def run(run_batch: Callable[[List[Query], int], List[Results]],
+            args: argparse.Namespace) -> None:
+        GraphCrawler(run_batch, args.output, args.direction,
+                     args.batch_size).crawl(args.seed, args.depth)
+
+    def __init__(self, run_batch: Callable[[List[Query], int], List[Results]],
+                 output: str, direction: str = 'both',
+                 batch_size: int = 20) -> None:
+        self.run_batch = run_batch
+        self.output = output
+        self.connections = [
+            connection for connection in (Followers, Following)
+            if direction in ('both', connection.connection)]
+        self.batch_size = batch_size
+        self.visited = Bitmap()
+        os.makedirs(output, exist_ok=True)
+
+    def frontier_path(self, depth: int) -> str:
+        return os.path.join(self.output, 'frontier-%d.bin' % depth)
+
+    def read_frontier(self, depth: int) -> Iterator[List[int]]:
+        with open(self.frontier_path(depth), 'rb') as f:
+            while True:
+                chunk = array('I')
+                try:
+                    chunk.fromfile(f, self.batch_size)
+                except EOFError:
+                    if chunk:
+                        yield chunk.tolist()
+                    return
+                yield chunk.tolist()
+
+    def crawl(self, seeds: List[str], depth: int) -> None:
+        with open(os.path.join(self.output, 'nodes.tsv'), 'w') as nodes, \
+                open(os.path.join(self.output, 'edges.tsv'), 'w') as edges:
+            self.interner = Interner(nodes)
+            self.edges = edges
+            with open(self.frontier_path(0), 'wb') as frontier:
+                for seed in seeds:
+                    index = self.interner.intern(seed)
+                    if self.visited.add(index):
+                        array('I', [index]).tofile(frontier)
+            for level in range(depth):
+                with open(self.frontier_path(level + 1), 'wb') as frontier:
+                    for chunk in self.read_frontier(level):
+                        self.expand(chunk, frontier)
+                self.log.info("Depth %s done: %s users, next frontier: %s" % (
+                    level + 1, len(self.interner.logins),
+                    os.path.getsize(self.frontier_path(level + 1)) // 4))
+
+    def expand(self, chunk: List[int], frontier: BinaryIO) -> None:
+        queries: List[User] = []
+        for index in chunk:
+            for connection in self.connections:
+                query: User = connection(argparse.Namespace(
+                    username=self.interner.logins[index]))
+                # A renamed or deleted login is a node without edges
+                query.ignore_not_found = True
+                queries.append(query)
+        discovered = array('I')
+        for query, users in zip(queries, self.run_batch(list(queries), self.batch_size)):
+            source = self.interner.ids[query.username]
+            for user in users:
+                if not user:
+                    continue
+                target = self.interner.intern(user['login'])
+                if query.connection == 'followers':
+                    self.edges.write('%d\t%d\n' % (target, source))
+                else:
+                    self.edges.write('%d\t%d\n' % (source, target))
+                if self.visited.add(target):
+                    discovered.append(target)
+        discovered.tofile(frontier)
@@ -20,15 +20,22 @@
 # SOFTWARE.
 
 import argparse
-from typing import Any, Dict, List, Optional
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional
 from abc import ABC, abstractmethod
 
+from . pagesize import PageSize
+
 Raw = Dict[str, Any]
-Result = Dict[str, Any]
+Result = Mapping[str, Any]
 Results = List[Result]
 
 
 class Query(ABC):
+    page_size: Optional[PageSize] = None
+    # Keep the data of responses with NOT_FOUND errors only
+    ignore_not_found = False
+
     @staticmethod
     @abstractmethod
     def sub_parser(parser: argparse._SubParsersAction) -> None:
@@ -42,20 +49,95 @@ class Query(ABC):
     def transform_result(self, raw: Raw) -> Results:
         ...
 
-    def sort(self, results: Results) -> Results:
-        return results
+    # transform_result in two steps: paginate moves the query to its next
+    # page and extract reads the records, possibly while the next page is
+    # fetched. By default the records are read by paginate.
+    def paginate(self, raw: Raw) -> Any:
+        return self.transform_result(raw)
+
+    def extract(self, page: Any) -> Results:
+        return list(page)
+
+    def variables(self) -> Dict[str, Any]:
+        return {}
+
+    # Order the records of all the pages, possibly without holding them all
+    def sort(self, pages: Iterable[Results]) -> Iterable[Result]:
+        return (result for page in pages for result in page)
+
+    def state(self) -> Dict[str, Any]:
+        return {}
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        pass
+
+    # Checkpoints append the journal entry of states to a file instead of
+    # rewriting it: once started, each state only holds the entries added
+    # since the previous one, and restore receives all of them
+    def start_journal(self) -> None:
+        pass
 
 
 class PaginatedQuery(Query):
+    initial_page_size = 100
+
     def __init__(self) -> None:
         self.after: Optional[str] = None
         self.count: Optional[int] = None
+        self.page_size: PageSize = PageSize(self.initial_page_size)
 
     def next_graph_query(self) -> Optional[str]:
-        if self.count and not self.after:
+        if self.count is not None and not self.after:
             return None
         return self.graph_query()
 
+    def variables(self) -> Dict[str, Any]:
+        return dict(first=self.page_size.first, after=self.after or None)
+
+    def transform_result(self, raw: Raw) -> Results:
+        return self.extract(self.paginate(raw))
+
+    @abstractmethod
+    def paginate(self, raw: Raw) -> Any:
+        ...
+
+    @abstractmethod
+    def extract(self, page: Any) -> Results:
+        ...
+
+    def state(self) -> Dict[str, Any]:
+        return dict(after=self.after, count=self.count,
+                    page_size=self.page_size.state())
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        self.after = state['after']
+        self.count = state['count']
+        if 'page_size' in state:
+            self.page_size.restore(state['page_size'])
+
     @abstractmethod
     def graph_query(self) -> str:
         ...
+
+
+# Piggyback the rate limit status on the response of graph_query, first so
+# that it is read before the edges of a streamed response
+def with_rate_limit(graph_query: str) -> str:
+    if 'rateLimit' in graph_query or '{' not in graph_query:
+        return graph_query
+    start = graph_query.index('{') + 1
+    return graph_query[:start] + '\n  rateLimit { cost remaining resetAt }\n' + graph_query[start:]
+
+
+# The root field of a graph query, skipping a batch alias and the rate limit
+def query_kind(graph_query: str) -> str:
+    root = re.match(
+        r'\s*(?:query\b[^{]*)?{\s*(?:rateLimit\s*{[^}]*}\s*)?(?:\w+\s*:\s*)?(\w+)', graph_query)
+    return root.group(1) if root else ''
+
+
+def positive(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("%s is not a positive number" % value)
+    return number
@@ -23,18 +23,37 @@
 
 
 import argparse
-import requests
+import asyncio
 import logging
 import logging.config
 import json
-from textwrap import dedent
-from time import sleep
-from datetime import datetime
+import sys
+from time import monotonic, sleep, time
+from datetime import datetime, timedelta
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple, Type, Union
 
-from . helpers import Query, PaginatedQuery, Raw, Result, Results
+from . builder import PAGE_VARIABLES, Batch, Field, Projection, compile_query, parse_fields
+from . helpers import Query, PaginatedQuery, Raw, Result, Results, positive, query_kind, with_rate_limit
+from . cache import ResponseCache
+from . archive import Archive
+from . checkpoint import Checkpoint
+from . dedup import Dedup
+from . decoder import get_decoder, stream_loads
+from . pagesize import PageSize
+from . pipeline import pipeline
+from . nodes import NodeTable
+from . ratelimit import TokenPool
+from . records import RepositoryRecord, UserRecord, json_default, write_csv
+from . retry import CircuitBreaker, RateLimitedError, RetryableError, RetryPolicy, payload_error, status_error
+from . server import JobParser, Server
+from . sorting import rank
+from . transport import RequestsTransport, Transport, get_transport
+from . graph import GraphCrawler
+from . metrics import Events, Metrics
 from . user import Followers, Following
 from . repository import Stargazers, Watchers
 
@@ -43,40 +62,82 @@ class GithubGraphQLQuery(object):
 
     log = logging.getLogger("yoshiki.GithubGraphQLQuery")
 
-    def __init__(self, token: str, url: str = 'https://api.github.com/graphql') -> None:
+    def __init__(self, token: Union[str, List[str]],
+                 url: str = 'https://api.github.com/graphql',
+                 cache: Optional[ResponseCache] = None,
+                 events: Optional[Events] = None,
+                 retry: Optional[RetryPolicy] = None,
+                 json_decoder: str = 'auto',
+                 transport: Optional[Transport] = None,
+                 archive: Optional[Archive] = None,
+                 replay: Optional[Archive] = None,
+                 pipeline_depth: int = 4,
+                 shared_budget: Optional[str] = None) -> None:
         self.url = url
-        self.headers = {'Authorization': 'token %s' % token}
-        self.session = requests.session()
-        # Will get every 25 requests
-        self.get_rate_limit_rate = 25
+        self.cache = cache
+        self.tokens = [token] if isinstance(token, str) else token
+        self.transport = transport or RequestsTransport()
         self.query_count = 0
-        # Set an initial value
-        self.quota_remain = 5000
-        self.set_rate_limit()
+        # The rate limit budget of each token is refreshed from every response
+        self.pool = TokenPool(self.tokens, shared=shared_budget)
+        # Expected cost of the next query, the cost of the last one
+        self.cost = 1
+        # Serialize the rate limit bookkeeping when queries run concurrently
+        self.lock = Lock()
+        self.events = events or Events()
+        self.retry = retry or RetryPolicy()
+        self.breaker = CircuitBreaker()
+        # The stream decoder only reads the pages of paginated queries
+        self.loads = get_decoder('auto' if json_decoder == 'stream' else json_decoder)
+        self.stream = json_decoder == 'stream'
+        # Record the response pages or read them back instead of the API
+        self.archive = archive
+        self.replay = replay
+        # Pages buffered between the fetch, extract and output stages, 0
+        # runs them one after the other
+        self.pipeline_depth = pipeline_depth
+        if replay is None:
+            for token in self.tokens:
+                self.set_rate_limit(token)
 
-    def set_rate_limit(self) -> None:
-        try:
-            ratelimit = self.getRateLimit()
-        except requests.exceptions.ConnectionError:
-            sleep(5)
-            ratelimit = self.getRateLimit()
-        self.quota_remain = ratelimit['remaining']
-        self.resetat = datetime.strptime(
-            ratelimit['resetAt'], '%Y-%m-%dT%H:%M:%SZ')
+    @property
+    def quota_remain(self) -> int:
+        return self.pool.remaining
+
+    @property
+    def resetat(self) -> datetime:
+        return datetime.utcfromtimestamp(self.pool.reset)
+
+    def set_rate_limit(self, token: str) -> None:
+        ratelimit = self.getRateLimit(token)
+        bucket = self.pool.buckets[token]
+        bucket.update(ratelimit)
         self.log.info("Got rate limit data: remain %s resetat %s" % (
-            self.quota_remain, self.resetat))
-
-    def wait_for_call(self) -> None:
-        if self.quota_remain <= 150:
-            until_reset = self.resetat - datetime.utcnow()
-            self.log.info(
-                "Quota remain: %s/calls delay until "
-                "reset: %s/secs waiting ..." % (
-                    self.quota_remain, until_reset.seconds))
-            sleep(until_reset.seconds + 60)
-            self.set_rate_limit()
-
-    def getRateLimit(self) -> Raw:
+            bucket.remaining, datetime.utcfromtimestamp(bucket.reset)))
+
+    def wait_for_call(self, cost: Optional[int] = None) -> str:
+        cost = cost or self.cost
+        while True:
+            token = self.pool.select(cost)
+            bucket = self.pool.buckets[token]
+            delay = bucket.acquire(cost)
+            if not delay:
+                break
+            if bucket.exhausted(cost):
+                # The selected token is the least exhausted one
+                self.log.info(
+                    "Quota remain: %s/calls delay until "
+                    "reset: %s/secs waiting ..." % (
+                        self.quota_remain, int(delay)))
+                sleep(delay)
+                self.events.emit('wait', reason='reset', seconds=delay)
+                self.set_rate_limit(token)
+            else:
+                sleep(delay)
+                self.events.emit('wait', reason='pacing', seconds=delay)
+        return token
+
+    def getRateLimit(self, token: str) -> Raw:
         qdata = '''{
           rateLimit {
             limit
@@ -85,67 +146,370 @@ class GithubGraphQLQuery(object):
             resetAt
           }
         }'''
-        data = self._query(qdata)
+        data = self.retrying(qdata, lambda: self._query(qdata, token=token), wait_reset=True)
         rate_limit = data['data']['rateLimit']
         if not isinstance(rate_limit, dict):
             raise Exception("Rate limit it not a dict: %s" % rate_limit)
         return rate_limit
 
-    def query(self, qdata: str, ignore_not_found: bool=False) -> Raw:
-        if self.query_count % self.get_rate_limit_rate == 0:
-            self.set_rate_limit()
-        self.wait_for_call()
-        return self._query(qdata, ignore_not_found)
-
-    def _query(self, qdata: str, ignore_not_found: bool=False) -> Raw:
-        data = {'query': qdata}
-        r = self.session.post(
-            url=self.url, json=data, headers=self.headers,
-            timeout=30.3)
+    def query(self, qdata: str, ignore_not_found: bool=False,
+              page_size: Optional[PageSize] = None,
+              variables: Optional[Dict[str, Any]] = None,
+              stream: bool = False) -> Raw:
+        if self.replay is not None:
+            ret = (stream_loads if stream else self.loads)(
+                self.replay.get(with_rate_limit(qdata), variables))
+            if not isinstance(ret, dict):
+                raise Exception("Archived result is not a dict: %s" % ret)
+            return ret
+        if self.cache:
+            cached = self.cache.get(self.url, qdata, variables)
+            self.events.emit('cache', kind=query_kind(qdata), hit=cached is not None)
+            if cached is not None:
+                return cached
+        ret = self.retrying(
+            qdata, lambda: self.attempt(
+                qdata, ignore_not_found, page_size, variables,
+                # Cached responses are stored as a whole
+                stream and not self.cache),
+            # A timed out page is sent again with a smaller size by the caller
+            ('timeout',) if page_size and page_size.first > page_size.minimum else ())
+        if self.cache:
+            self.cache.put(self.url, qdata, ret, variables)
+        return ret
+
+    def attempt(self, qdata: str, ignore_not_found: bool=False,
+                page_size: Optional[PageSize] = None,
+                variables: Optional[Dict[str, Any]] = None,
+                stream: bool = False) -> Raw:
+        with self.lock:
+            # Debit the budget now so that in-flight requests are accounted
+            cost = self.cost
+            token = self.wait_for_call(cost)
+        bucket = self.pool.buckets[token]
+        try:
+            ret = self._query(
+                with_rate_limit(qdata), ignore_not_found, token, page_size, variables, stream)
+        except RateLimitedError as e:
+            with self.lock:
+                bucket.exhaust(e.reset)
+            raise
+        finally:
+            with self.lock:
+                bucket.settle(cost)
+        rate_limit = (ret.get('data') or {}).get('rateLimit')
+        if rate_limit:
+            with self.lock:
+                bucket.update(rate_limit)
+                self.cost = int(rate_limit['cost'])
+            self.events.emit('cost', kind=query_kind(qdata), cost=self.cost)
+        return ret
+
+    def retrying(self, qdata: str, call: Callable[[], Raw],
+                 fail_fast: Tuple[str, ...] = (), wait_reset: bool = False) -> Raw:
+        kind = query_kind(qdata)
+        attempt = 0
+        while True:
+            wait = self.breaker.wait(self.url)
+            if wait:
+                self.log.info("Circuit open for %s, waiting %.1f/secs" % (self.url, wait))
+                sleep(wait)
+                continue
+            try:
+                ret = call()
+            except RateLimitedError as e:
+                # attempt() marks the token exhausted, the next attempt waits
+                # for another token or for the reset. The calls outside of the
+                # token budgets wait for the reset here.
+                delay = max(e.reset - time(), 0) + 1 if wait_reset else 0
+                self.log.warning("%s, retrying in %.1f/secs" % (e, delay))
+                self.events.emit('retry', kind=kind, reason=e.reason, delay=delay)
+                sleep(delay)
+                continue
+            except RetryableError as e:
+                self.breaker.failure(self.url)
+                attempt += 1
+                if attempt >= self.retry.attempts or e.reason in fail_fast:
+                    raise
+                delay = self.retry.delay(attempt, e.retry_after)
+                self.log.warning("%s, retrying in %.1f/secs (%s/%s)" % (
+                    e, delay, attempt, self.retry.attempts))
+                self.events.emit('retry', kind=kind, reason=e.reason, delay=delay)
+                sleep(delay)
+                continue
+            self.breaker.success(self.url)
+            return ret
+
+    def _query(self, qdata: str, ignore_not_found: bool=False,
+               token: Optional[str] = None,
+               page_size: Optional[PageSize] = None,
+               variables: Optional[Dict[str, Any]] = None,
+               stream: bool = False) -> Raw:
+        data: Dict[str, Any] = {'query': qdata}
+        if variables:
+            data['variables'] = variables
+        headers = {'Authorization': 'token %s' % (token or self.tokens[0]),
+                   'Content-Type': 'application/json'}
+        kind = query_kind(qdata)
+        start = monotonic()
+        status, response_headers, content = self.transport.post(
+            self.url, json.dumps(data).encode(), headers)
         self.query_count += 1
-        if not r.status_code != "200":
-            raise Exception("No ok response code see: %s" % r.text)
-        ret = r.json()
-        if 'errors' in ret:
-            raise Exception("Errors in response see: %s" % r.text)
+        seconds = monotonic() - start
+        self.events.emit(
+            'request', kind=kind, status=status,
+            seconds=seconds, bytes=len(content))
+        if status != 200:
+            raise status_error(status, response_headers, content.decode('utf-8', 'replace'))
+        start = monotonic()
+        ret = (stream_loads if stream else self.loads)(content)
+        self.events.emit('decode', kind=kind, seconds=monotonic() - start)
         if not isinstance(ret, dict):
             raise Exception("Graph result is not a dict: %s" % ret)
+        if 'errors' in ret:
+            error = payload_error(ret, response_headers, ignore_not_found)
+            if error:
+                raise error
+        if self.archive is not None and kind != 'rateLimit':
+            self.archive.append(qdata, variables, content)
+        if page_size:
+            rate_limit = (ret.get('data') or {}).get('rateLimit') or {}
+            page_size.observe(seconds, rate_limit.get('cost'), len(content))
         return ret
 
+    def fetch(self, query: Query, graph_query: str) -> Optional[Raw]:
+        # None when the page timed out and must be asked again, smaller
+        try:
+            return self.query(
+                graph_query, query.ignore_not_found, page_size=query.page_size,
+                variables=query.variables(),
+                stream=self.stream and isinstance(query, PaginatedQuery))
+        except RetryableError as e:
+            if e.reason != 'timeout' or not query.page_size or not query.page_size.shrink():
+                raise
+            return None
+
+    def iter_raw(self, query: Query) -> Iterator[Raw]:
+        while True:
+            graph_query = query.next_graph_query()
+            if not graph_query:
+                break
+            data = self.fetch(query, graph_query)
+            if data is not None:
+                yield data
+
+    def iter_states(self, query: Query,
+                    states: bool = True) -> Iterator[Tuple[Results, Dict[str, Any]]]:
+        # Fetch the next page as soon as the cursor of the previous one is
+        # known, while the previous page is extracted and consumed. Each
+        # page comes with the query state to resume after it.
+        def fetch() -> Iterator[Tuple[Any, Dict[str, Any]]]:
+            for data in self.iter_raw(query):
+                page = query.paginate(data)
+                yield page, query.state() if states else {}
+
+        def extract(item: Tuple[Any, Dict[str, Any]]) -> Tuple[Results, Dict[str, Any]]:
+            page, state = item
+            return self.extract(query, page), state
+        if not self.pipeline_depth:
+            yield from map(extract, fetch())
+            return
+        yield from pipeline(fetch(), [extract], self.pipeline_depth)
+
+    def iter_pages(self, query: Query) -> Iterator[Results]:
+        for page, _ in self.iter_states(query, states=False):
+            yield page
+
+    def extract(self, query: Query, page: Any) -> Results:
+        start = monotonic()
+        results = query.extract(page)
+        self.events.emit(
+            'transform', query=type(query).__name__,
+            seconds=monotonic() - start, records=len(results))
+        return results
+
+    def transform(self, query: Query, data: Raw) -> Results:
+        start = monotonic()
+        results = query.transform_result(data)
+        self.events.emit(
+            'transform', query=type(query).__name__,
+            seconds=monotonic() - start, records=len(results))
+        return results
+
+    def iter_results(self, query: Query) -> Iterator[Result]:
+        for page in self.iter_pages(query):
+            yield from page
+
     def run(self, query: Query) -> Results:
+        return list(query.sort(self.iter_pages(query)))
+
+    def run_batch(self, queries: List[Query], size: int = 20) -> List[Results]:
+        # Merge the next page of up to size queries in one aliased document
+        results: List[Results] = [[] for _ in queries]
+        pending = list(range(len(queries)))
+        while pending:
+            batch: List[Tuple[int, str, str]] = []
+            document = Batch()
+            for index in list(pending):
+                if len(batch) == size:
+                    break
+                graph_query = queries[index].next_graph_query()
+                if not graph_query:
+                    pending.remove(index)
+                    continue
+                alias = 'q%d' % index
+                root = document.add(alias, graph_query, queries[index].variables())
+                batch.append((index, alias, root))
+            if not batch:
+                break
+            data = self.query(
+                document.document(),
+                all(queries[index].ignore_not_found for index, _, _ in batch),
+                variables=document.variables)
+            self.log.info("Batch of %s queries read" % len(batch))
+            for index, alias, root in batch:
+                if data['data'][alias] is None:
+                    # Renamed or deleted, the query has nothing more to read
+                    self.log.warning("No %s for %s, skipped" % (root, alias))
+                    pending.remove(index)
+                    continue
+                results[index] += self.transform(
+                    queries[index], {'data': {root: data['data'][alias]}})
+        return [list(query.sort([result])) for query, result in zip(queries, results)]
+
+
+class AsyncGithubGraphQLQuery(GithubGraphQLQuery):
+
+    log = logging.getLogger("yoshiki.AsyncGithubGraphQLQuery")
+
+    async def arun(self, query: Query, semaphore: asyncio.Semaphore,
+                   executor: ThreadPoolExecutor) -> Results:
+        loop = asyncio.get_running_loop()
         results: Results = []
         while True:
             graph_query = query.next_graph_query()
             if not graph_query:
                 break
-            data = self.query(graph_query)
-            results += query.transform_result(data)
-        return query.sort(results)
+            async with semaphore:
+                data = await loop.run_in_executor(executor, self.fetch, query, graph_query)
+            if data is not None:
+                results += self.transform(query, data)
+        return list(query.sort([results]))
+
+    async def run_many(self, queries: List[Query], concurrency: int = 8) -> List[Results]:
+        self.transport.resize(concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(await asyncio.gather(
+                *[self.arun(query, semaphore, executor) for query in queries]))
+
+
+def stars(result: Result) -> int:
+    return int(result.get('stars', 0))
+
+
+def topics(node: Dict[str, Any]) -> Tuple[str, ...]:
+    return tuple(sys.intern(t['node']['topic']['name']) for t in node['repositoryTopics']['edges'])
+
+
+# The fields of repository records, --fields selects some of them
+REPOSITORY_FIELDS: Dict[str, Field] = {
+    'name': ('nameWithOwner', lambda node: node['nameWithOwner']),
+    'owner': ('nameWithOwner', lambda node: sys.intern(node['nameWithOwner'].split('/')[0])),
+    'default_branch': ('defaultBranchRef { name }', lambda node: node['defaultBranchRef']['name']),
+    'description': ('description', lambda node: node['description'] or ''),
+    'stars': ('stargazers { totalCount }', lambda node: node['stargazers']['totalCount']),
+    # Search results do not read the stargazers
+    'stargazers': ('', lambda node: ()),
+    'forks': ('forks { totalCount }', lambda node: node['forks']['totalCount']),
+    'watchers': ('watchers { totalCount }', lambda node: node['watchers']['totalCount']),
+    'topics': ('repositoryTopics(first: 100) { edges { node { topic { name } } } }', topics),
+}
+
+# The fields of user records read by refresh
+USER_FIELDS: Dict[str, Field] = {
+    'name': ('name', lambda node: node['name']),
+    'login': ('login', lambda node: node['login']),
+    'followers': ('followers { totalCount }', lambda node: node['followers']['totalCount']),
+    'following': ('following { totalCount }', lambda node: node['following']['totalCount']),
+    'repositories': ('repositories { totalCount }',
+                     lambda node: node['repositories']['totalCount']),
+}
 
 
 class SearchProjects(PaginatedQuery):
     log = logging.getLogger("yoshiki.SearchProjects")
+    initial_page_size = 25
 
     @staticmethod
     def sub_parser(parser: argparse._SubParsersAction) -> None:
         sub = parser.add_parser("search-projects")
-        sub.set_defaults(query=SearchProjects)
+        sub.set_defaults(query=SearchProjects.from_args)
         sub.add_argument(
             '--stars', help='Gather projects with stars > to',
             required=True)
         sub.add_argument(
             '--terms', help='Extra search term such as language:ocaml')
+        sub.add_argument(
+            '--shard', action='store_true',
+            help='Split the stars range in shards of less than 1000 results '
+                 'and crawl them together')
+        sub.add_argument(
+            '--shard-created', action='store_true',
+            help='Also split shards by creation date when a single stars '
+                 'count has more than 1000 results')
+        sub.add_argument(
+            '--batch-size', type=positive, default=10,
+            help='Number of shards read per request')
+        sub.add_argument(
+            '--fields', help='Comma separated fields to read, among: %s' % ','.join(
+                REPOSITORY_FIELDS))
+        sub.add_argument(
+            '--top', type=positive, dest='top_k', metavar='K',
+            help='Only keep the K most starred projects')
+        sub.add_argument(
+            '--sort-buffer', type=int, default=100000,
+            help='Number of projects sorted in memory, more are sorted on disk')
+        sub.add_argument(
+            '--dedup', choices=['exact', 'bloom'],
+            help='Drop the projects read twice, keeping their names in a set or, '
+                 'with a bounded memory and rare false positives, in a Bloom filter '
+                 '(sharded searches use an exact set by default)')
+        sub.add_argument(
+            '--dedup-capacity', type=int, default=1000000,
+            help='Number of projects the Bloom filter holds with 0.1%% of false positives')
 
-    def __init__(self, args: argparse.Namespace) -> None:
+    @staticmethod
+    def from_args(args: argparse.Namespace) -> Query:
+        if getattr(args, 'shard', False):
+            return ShardedSearchProjects(args)
+        return SearchProjects(args)
+
+    def __init__(self, args: argparse.Namespace, dedup: Optional[Dedup] = None) -> None:
         super().__init__()
         self.stars: int = int(args.stars)
         self.terms: str = args.terms
-
-    def graph_query(self) -> str:
-        return dedent(
+        # Optional upper bound (inclusive) and creation date range
+        self.max_stars: Optional[int] = getattr(args, 'max_stars', None)
+        self.created: Optional[str] = getattr(args, 'created', None)
+        # Bounds the memory used to order the results
+        self.top_k: Optional[int] = getattr(args, 'top_k', None)
+        self.sort_buffer: Optional[int] = getattr(args, 'sort_buffer', None)
+        self.projection = Projection(
+            REPOSITORY_FIELDS, parse_fields(getattr(args, 'fields', None)), RepositoryRecord)
+        # Drop the repositories read again as they move between pages, shards
+        # share the one of their sharded query
+        self.shared_dedup = dedup is not None
+        self.dedup = dedup
+        if dedup is None and getattr(args, 'dedup', None):
+            self.dedup = Dedup(args.dedup, args.dedup_capacity)
+        selection = self.projection.selection
+        if self.dedup is not None and 'nameWithOwner' not in selection.split('\n'):
+            selection += '\nnameWithOwner'
+        self.document = compile_query(
         """
         {
-          search(query: "stars:>%(stars)s%(terms)s is:public fork:false archived:false sort:stars-asc", type: REPOSITORY, first: 25%(after)s) {
+          search(query: %(query)s, type: REPOSITORY, first: $first, after: $after) {
             repositoryCount
             pageInfo {
                 hasNextPage endCursor
@@ -153,65 +517,38 @@ class SearchProjects(PaginatedQuery):
             edges {
               node {
                 ... on Repository {
-                  nameWithOwner
-                  defaultBranchRef {
-                      name
-                  }
-                  description
-                  stargazers {
-                    totalCount
-                  }
-                  forks {
-                    totalCount
-                  }
-                  watchers {
-                    totalCount
-                  }
-                  repositoryTopics(first: 100) {
-                      edges {
-                          node {
-                            topic {
-                              name
-                          }
-                      }
-                    }
-                  }
+                  %(selection)s
                 }
               }
             }
           }
         }
         """ % dict(
-            after=', after: "%s"' % self.after if self.after else '',
-            stars=self.stars,
-            terms=' ' + self.terms if self.terms else '',
-        ))
+            query=json.dumps(self.qualifiers() + ' sort:stars-asc'),
+            selection=selection,
+        ), PAGE_VARIABLES)
 
-    @staticmethod
-    def strip(_repo: Result) -> Result:
-        _repo = _repo['node']
+    def qualifiers(self) -> str:
+        if self.max_stars is None:
+            stars = 'stars:>%s' % self.stars
+        else:
+            stars = 'stars:%s..%s' % (self.stars + 1, self.max_stars)
+        return '%s%s%s is:public fork:false archived:false' % (
+            stars,
+            ' created:' + self.created if self.created else '',
+            ' ' + self.terms if self.terms else '')
+
+    def graph_query(self) -> str:
+        return self.document
+
+    def strip(self, edge: Result) -> Result:
         try:
-            return {
-                'name': _repo['nameWithOwner'],
-                'owner': _repo['nameWithOwner'].split('/')[0],
-                'default_branch': _repo['defaultBranchRef']['name'],
-                'description': _repo['description'] or '',
-                'stars': _repo['stargazers']['totalCount'],
-                'stargazers': [
-                    t['node']['login'] for t in
-                    _repo['stargazers'].get('edges', [])
-                ],
-                'forks': _repo['forks']['totalCount'],
-                'watchers': _repo['watchers']['totalCount'],
-                'topics': [
-                    t['node']['topic']['name'] for t in
-                    _repo['repositoryTopics']['edges']]
-            }
+            return self.projection.extract(edge['node'])
         except Exception:
-            SearchProjects.log.exception("Error to parse repository data %s" % _repo)
+            self.log.exception("Error to parse repository data %s" % edge['node'])
             return {}
 
-    def transform_result(self, ret: Raw) -> Results:
+    def paginate(self, ret: Raw) -> Any:
         if not self.count:
             self.count = int(ret['data']['search']['repositoryCount'])
             self.log.info(f"{self.count} repositories to fetch")
@@ -220,77 +557,253 @@ class SearchProjects(PaginatedQuery):
             self.after = pageInfo['endCursor']
         else:
             self.after = ''
-        repos = [sr for sr in [SearchProjects.strip(r) for r in ret['data']['search']['edges']] if sr]
+        edges = ret['data']['search']['edges']
+        if self.dedup is not None:
+            edges = self.dedup.filter(edges, lambda edge: edge['node']['nameWithOwner'])
+            # Reported once the last page is read, whatever the output
+            if not self.after and not self.shared_dedup:
+                self.dedup.report()
+        return edges
+
+    def extract(self, edges: Any) -> Results:
+        repos = [sr for sr in [self.strip(r) for r in edges] if sr]
         self.log.info("%s repositories read" % len(repos))
         return repos
 
-    def sort(self, results: Results) -> Results:
-        return sorted(results, key=lambda x: x.get('stars', 0), reverse=True)
+    def sort(self, pages: Iterable[Results]) -> Iterable[Result]:
+        return rank(pages, stars, self.top_k, self.sort_buffer)
+
+    def state(self) -> Dict[str, Any]:
+        state = super().state()
+        if self.dedup is not None and not self.shared_dedup:
+            state['dedup'] = self.dedup.state()
+            state['journal'] = self.dedup.journal()
+        return state
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        super().restore(state)
+        if self.dedup is not None and 'dedup' in state:
+            self.dedup.restore(state['dedup'])
+            self.dedup.replay(state.get('journal', []))
+
+    def start_journal(self) -> None:
+        if self.dedup is not None and not self.shared_dedup:
+            self.dedup.start_journal()
+
+
+# A search range: stars > low, stars <= high and a creation date range
+Shard = Tuple[int, Optional[int], Optional[str]]
+
+
+class ShardedSearchProjects(Query):
+    log = logging.getLogger("yoshiki.ShardedSearchProjects")
+    # GitHub search does not return more than 1000 results per query
+    search_limit = 1000
+    first_created = '2007-10-01'
+
+    @staticmethod
+    def sub_parser(parser: argparse._SubParsersAction) -> None:
+        raise Exception("Sharded searches are run by search-projects --shard")
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.terms: str = args.terms
+        self.size: int = getattr(args, 'batch_size', 10)
+        self.fields: Optional[str] = getattr(args, 'fields', None)
+        self.split_created: bool = getattr(args, 'shard_created', False)
+        # Ranges to count before being crawled or split again
+        self.probes: List[Shard] = [(int(args.stars), None, None)]
+        self.top: Optional[int] = None
+        self.shards: List[SearchProjects] = []
+        self.batch: List[Tuple[str, Any]] = []
+        self.batch_variables: Dict[str, Any] = {}
+        # Shards overlap on their bounds and repositories move between them
+        self.dedup = Dedup(
+            getattr(args, 'dedup', None) or 'exact', getattr(args, 'dedup_capacity', 1000000))
+        self.top_k: Optional[int] = getattr(args, 'top_k', None)
+        self.sort_buffer: Optional[int] = getattr(args, 'sort_buffer', None)
+
+    def shard(self, shard: Shard) -> SearchProjects:
+        stars, max_stars, created = shard
+        return SearchProjects(argparse.Namespace(
+            stars=stars, terms=self.terms, max_stars=max_stars, created=created,
+            fields=self.fields), self.dedup)
+
+    def probe_query(self) -> str:
+        selections: List[str] = []
+        self.batch = []
+        self.batch_variables = {}
+        if self.top is None:
+            # The most starred repository gives the upper bound of the range
+            selections.append(
+                'top: search(query: %s, type: REPOSITORY, '
+                'first: 1) { edges { node { ... on Repository { '
+                'stargazers { totalCount } } } } }' % json.dumps(
+                    self.shard(self.probes[0]).qualifiers() + ' sort:stars-desc'))
+        for index, probe in enumerate(self.probes[:self.size]):
+            alias = 'p%d' % index
+            selections.append(
+                '%s: search(query: %s, type: REPOSITORY, first: 1) '
+                '{ repositoryCount }' % (alias, json.dumps(self.shard(probe).qualifiers())))
+            self.batch.append((alias, probe))
+        self.probes = self.probes[self.size:]
+        return '{\n%s\n}' % '\n'.join(selections)
+
+    def next_graph_query(self) -> Optional[str]:
+        if self.probes:
+            return self.probe_query()
+        self.shards = [shard for shard in self.shards if shard.next_graph_query()]
+        document = Batch()
+        self.batch = []
+        for index, shard in enumerate(self.shards[:self.size]):
+            alias = 's%d' % index
+            graph_query = shard.next_graph_query()
+            assert graph_query
+            document.add(alias, graph_query, shard.variables())
+            self.batch.append((alias, shard))
+        self.batch_variables = document.variables
+        if not document:
+            return None
+        return document.document()
+
+    def variables(self) -> Dict[str, Any]:
+        return self.batch_variables
+
+    def split_dates(self, shard: Shard) -> List[Shard]:
+        stars, max_stars, created = shard
+        first, last = (created or '%s..%s' % (
+            self.first_created, datetime.utcnow().strftime('%Y-%m-%d'))).split('..')
+        start = datetime.strptime(first, '%Y-%m-%d')
+        end = datetime.strptime(last, '%Y-%m-%d')
+        if start == end:
+            return []
+        middle = start + (end - start) / 2
+        return [
+            (stars, max_stars, '%s..%s' % (first, middle.strftime('%Y-%m-%d'))),
+            (stars, max_stars, '%s..%s' % (
+                (middle + timedelta(days=1)).strftime('%Y-%m-%d'), last))]
+
+    def plan(self, probe: Shard, count: int) -> None:
+        stars, max_stars, created = probe
+        if count <= self.search_limit:
+            if count:
+                self.shards.append(self.shard(probe))
+            return
+        if max_stars is None:
+            max_stars = self.top or stars + 1
+        if max_stars - stars > 1:
+            middle = (stars + max_stars) // 2
+            self.probes += [(stars, middle, created), (middle, max_stars, created)]
+            return
+        split = self.split_created and self.split_dates(probe)
+        if split:
+            self.probes += split
+            return
+        self.log.warning("%s repositories in %s, only %s can be read" % (
+            count, self.shard(probe).qualifiers(), self.search_limit))
+        self.shards.append(self.shard(probe))
+
+    def transform_result(self, raw: Raw) -> Results:
+        data = raw['data']
+        if 'top' in data:
+            edges = data['top']['edges']
+            self.top = edges[0]['node']['stargazers']['totalCount'] if edges else 0
+        results: Results = []
+        planned = False
+        for alias, item in self.batch:
+            if isinstance(item, SearchProjects):
+                results += item.transform_result({'data': {'search': data[alias]}})
+            else:
+                planned = True
+                self.plan(item, int(data[alias]['repositoryCount']))
+        if planned and not self.probes:
+            self.log.info("%s shards to fetch" % len(self.shards))
+        self.batch = []
+        if not self.probes and not any(shard.next_graph_query() for shard in self.shards):
+            self.dedup.report()
+        return results
+
+    def sort(self, pages: Iterable[Results]) -> Iterable[Result]:
+        return rank(pages, stars, self.top_k, self.sort_buffer)
+
+    def state(self) -> Dict[str, Any]:
+        return dict(
+            probes=list(self.probes), top=self.top, dedup=self.dedup.state(),
+            journal=self.dedup.journal(),
+            shards=[dict(
+                shard=(shard.stars, shard.max_stars, shard.created),
+                **shard.state()) for shard in self.shards])
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        self.probes = [tuple(probe) for probe in state['probes']]
+        self.top = state['top']
+        self.dedup.restore(state['dedup'])
+        self.dedup.replay(state.get('journal', []))
+        self.shards = []
+        for shard_state in state['shards']:
+            shard = self.shard(tuple(shard_state['shard']))
+            shard.restore(shard_state)
+            self.shards.append(shard)
+
+    def start_journal(self) -> None:
+        self.dedup.start_journal()
 
 
 
 class Repositories(PaginatedQuery):
     log = logging.getLogger("yoshiki.Repositories")
+    # Each repository reads up to 100 stargazers and topics
+    initial_page_size = 20
 
     @staticmethod
     def sub_parser(parser: argparse._SubParsersAction) -> None:
         sub = parser.add_parser(f"list-repositories")
         sub.set_defaults(query=Repositories)
         sub.add_argument('--username', help='The user name', required=True)
+        sub.add_argument(
+            '--fields', help='Comma separated fields to read, among: %s' % ','.join(
+                Repositories.fields))
+
+    fields = dict(
+        REPOSITORY_FIELDS,
+        stargazers=('stargazerLogins: stargazers(first: 100) { edges { node { login } } }',
+                    lambda node: tuple(t['node']['login'] for t in node['stargazerLogins']['edges'])))
 
     def __init__(self, args: argparse.Namespace) -> None:
         super().__init__()
         self.username: str = args.username
-
-    def graph_query(self) -> str:
-        return dedent(
+        self.projection = Projection(
+            self.fields, parse_fields(getattr(args, 'fields', None)), RepositoryRecord)
+        self.document = compile_query(
         """
         {
-          user(login: "%(username)s") {
-            repositories(isFork: false first: 100 orderBy: {direction: DESC field: STARGAZERS}%(after)s) {
+          user(login: %(username)s) {
+            repositories(isFork: false, first: $first, after: $after, orderBy: {direction: DESC, field: STARGAZERS}) {
               totalCount
               pageInfo {
                 hasNextPage endCursor
               }
               edges {
                 node {
-                  nameWithOwner
-                  defaultBranchRef {
-                      name
-                  }
-                  description
-                  stargazers(first: 100) {
-                    totalCount
-                    edges {
-                      node {
-                        login
-                      }
-                    }
-                  }
-                  forks {
-                    totalCount
-                  }
-                  watchers {
-                    totalCount
-                  }
-                  repositoryTopics(first: 100) {
-                    edges {
-                      node {
-                        topic {
-                          name
-                        }
-                      }
-                    }
-                  }
+                  %(selection)s
                 }
               }
             }
           }
         }
-        """ % dict(after=', after: "%s"' % self.after if self.after else '',
-                   username=self.username))
+        """ % dict(username=json.dumps(self.username),
+                   selection=self.projection.selection), PAGE_VARIABLES)
 
-    def transform_result(self, ret: Raw) -> Results:
+    def graph_query(self) -> str:
+        return self.document
+
+    def strip(self, edge: Result) -> Result:
+        try:
+            return self.projection.extract(edge['node'])
+        except Exception:
+            self.log.exception("Error to parse repository data %s" % edge['node'])
+            return {}
+
+    def paginate(self, ret: Raw) -> Any:
         if not self.count:
             self.count = int(ret['data']['user']['repositories']['totalCount'])
             self.log.info(f"{self.count} repositories to fetch")
@@ -299,43 +812,346 @@ class Repositories(PaginatedQuery):
             self.after = pageInfo['endCursor']
         else:
             self.after = ''
-        repos = [sr for sr in [SearchProjects.strip(r) for r in ret['data']['user']['repositories']['edges']] if sr]
+        return ret['data']['user']['repositories']['edges']
+
+    def extract(self, edges: Any) -> Results:
+        repos = [sr for sr in [self.strip(r) for r in edges] if sr]
         self.log.info("%s repositories read" % len(repos))
         return repos
 
 
-queries = [SearchProjects, Followers, Following, Repositories, Stargazers, Watchers]
+class Refresh(Query):
+    log = logging.getLogger("yoshiki.Refresh")
+    # Deleted nodes are returned as null with a NOT_FOUND error
+    ignore_not_found = True
 
-def main() -> None:
+    @staticmethod
+    def sub_parser(parser: argparse._SubParsersAction) -> None:
+        sub = parser.add_parser("refresh")
+        sub.set_defaults(query=Refresh)
+        sub.add_argument(
+            '--kind', choices=['repository', 'user'], default='repository',
+            help='The kind of the entities to refresh')
+        sub.add_argument(
+            '--names', required=True,
+            help='File of the repositories (owner/name) or users (login) to '
+                 'refresh, one per line, - reads the standard input')
+        sub.add_argument(
+            '--node-table', default='~/.cache/yoshiki/nodes.tsv',
+            help='File mapping the names to their node ids, the unknown ones '
+                 'are looked up and added to it')
+        sub.add_argument(
+            '--batch-size', type=positive, default=100,
+            help='Number of nodes read per request (at most 100)')
+        sub.add_argument(
+            '--fields', help='Comma separated fields to read, among: %s for '
+                             'repositories and %s for users' % (
+                                 ','.join(REPOSITORY_FIELDS), ','.join(USER_FIELDS)))
 
-    parser = argparse.ArgumentParser(prog='yoshiki')
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.kind: str = getattr(args, 'kind', 'repository')
+        self.size: int = min(getattr(args, 'batch_size', 100), 100)
+        if args.names == '-':
+            names = sys.stdin.read().split()
+        else:
+            with open(args.names) as f:
+                names = f.read().split()
+        self.names: List[str] = list(dict.fromkeys(names))
+        self.table = NodeTable(getattr(args, 'node_table', '~/.cache/yoshiki/nodes.tsv'))
+        if self.kind == 'repository':
+            self.projection = Projection(
+                REPOSITORY_FIELDS, parse_fields(getattr(args, 'fields', None)), RepositoryRecord)
+        else:
+            self.projection = Projection(
+                USER_FIELDS, parse_fields(getattr(args, 'fields', None)), UserRecord)
+        self.document = compile_query(
+        """
+        {
+          nodes(ids: $ids) {
+            ... on %(type)s {
+              %(selection)s
+            }
+          }
+        }
+        """ % dict(type=self.kind.title(), selection=self.projection.selection),
+            {'ids': '[ID!]!'})
+        # Names to look up, then the offset in names of the next nodes to read
+        self.unresolved = [name for name in self.names if self.table.get(self.kind, name) is None]
+        self.missing: Set[str] = set()
+        self.offset = 0
+        self.batch: List[str] = []
+        self.end = 0
+        if self.unresolved:
+            self.log.info("%s of %s %s ids to look up" % (
+                len(self.unresolved), len(self.names), self.kind))
+
+    def lookup(self, name: str) -> str:
+        if self.kind == 'user':
+            return 'user(login: %s)' % json.dumps(name)
+        owner, _, repository = name.partition('/')
+        return 'repository(owner: %s, name: %s)' % (json.dumps(owner), json.dumps(repository))
+
+    def next_graph_query(self) -> Optional[str]:
+        if self.unresolved:
+            self.batch = self.unresolved[:self.size]
+            return '{\n%s\n}' % '\n'.join(
+                'n%d: %s { id }' % (index, self.lookup(name))
+                for index, name in enumerate(self.batch))
+        self.batch = []
+        self.end = self.offset
+        while self.end < len(self.names) and len(self.batch) < self.size:
+            if self.table.get(self.kind, self.names[self.end]) is not None:
+                self.batch.append(self.names[self.end])
+            self.end += 1
+        if not self.batch:
+            return None
+        return self.document
+
+    def variables(self) -> Dict[str, Any]:
+        if self.unresolved:
+            return {}
+        return dict(ids=[self.table.get(self.kind, name) for name in self.batch])
+
+    def transform_result(self, raw: Raw) -> Results:
+        data = raw['data'] or {}
+        if self.unresolved:
+            for index, name in enumerate(self.batch):
+                node = data.get('n%d' % index)
+                if node:
+                    self.table.add(self.kind, name, node['id'])
+                else:
+                    self.log.warning("%s %s not found" % (self.kind.title(), name))
+                    self.missing.add(name)
+            self.unresolved = self.unresolved[len(self.batch):]
+            return []
+        results: Results = []
+        for name, node in zip(self.batch, data['nodes']):
+            if not node:
+                # The ids of renamed nodes do not change, deleted ones are forgotten
+                self.log.warning("%s %s no longer exists" % (self.kind.title(), name))
+                self.table.forget(self.kind, name)
+                continue
+            try:
+                results.append(self.projection.extract(node))
+            except Exception:
+                self.log.exception("Error to parse %s data %s" % (self.kind, node))
+        self.offset = self.end
+        self.log.info("%s of %s %s refreshed" % (self.offset, len(self.names), self.kind))
+        return results
+
+    def state(self) -> Dict[str, Any]:
+        # Looked up ids are in the node table
+        return dict(offset=self.offset, missing=sorted(self.missing))
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        self.offset = state['offset']
+        self.missing = set(state['missing'])
+        self.unresolved = [
+            name for name in self.names
+            if name not in self.missing and self.table.get(self.kind, name) is None]
+
+
+queries: List[Type[Query]] = [
+    SearchProjects, Followers, Following, Repositories, Stargazers, Watchers, Refresh]
+commands = [GraphCrawler]
+
+def job_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--json', help='Print a json list', action='store_true')
+    parser.add_argument(
+        '--csv', help='Print a csv table', action='store_true')
+    parser.add_argument(
+        '--ndjson', action='store_true',
+        help='Stream one json record per line as pages are read (unsorted)')
+    parser.add_argument(
+        '--page-size', type=int,
+        help='Read pages of this size instead of adapting the size to the '
+             'response times, sizes and costs')
+    parser.add_argument(
+        '--checkpoint-dir', default='~/.cache/yoshiki/jobs',
+        help='Directory where job checkpoints are stored')
+    parser.add_argument(
+        '--resume', metavar='JOB_ID',
+        help='Checkpoint the crawl after every page under this job id and '
+             'continue from the last committed page if it already exists')
+
+
+def daemon_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         '--loglevel', help='logging level', default='INFO')
     parser.add_argument(
-        '--token', help='The token used to query github api',
-        required=True)
+        '--token', action='append', default=[],
+        help='The token used to query github api, can be repeated or '
+             'comma separated to spread the queries over several tokens')
     parser.add_argument(
-        '--json', help='Print a json list', action='store_true')
+        '--token-file', help='A file with one token per line')
+    parser.add_argument(
+        '--cache-dir', help='Cache responses in this directory')
+    parser.add_argument(
+        '--cache-ttl', action='append', default=[],
+        help='Cache time to live in seconds, either a default value or '
+             'per query kind such as search=600 (can be repeated)')
+    parser.add_argument(
+        '--cache-size', type=int, default=512,
+        help='Maximum cache size in MB')
+    parser.add_argument(
+        '--json-decoder', choices=['auto', 'orjson', 'json', 'stream'], default='auto',
+        help='Decode responses with orjson (auto when installed) or the json module, '
+             'stream decodes the pages one node at a time to lower the memory usage')
+    parser.add_argument(
+        '--transport', choices=['requests', 'http2'], default='requests',
+        help='HTTP client, http2 multiplexes the requests with httpx (needs httpx[http2])')
+    parser.add_argument(
+        '--pool-size', type=int, default=10,
+        help='Number of kept alive connections')
+    parser.add_argument(
+        '--max-attempts', type=int, default=8,
+        help='Number of attempts of a query failing with a retryable error')
+    parser.add_argument(
+        '--shared-budget', nargs='?', const='~/.cache/yoshiki/budget', metavar='DIR',
+        help='Share the rate limit budget of the tokens with the other yoshiki '
+             'processes of the host through state files in this directory')
+    parser.add_argument(
+        '--pipeline-depth', type=int, default=4,
+        help='Number of pages fetched ahead while the previous ones are '
+             'transformed and written, 0 disables the pipeline')
+    parser.add_argument(
+        '--stats', action='store_true',
+        help='Print a summary of the request, decode, transform and wait times at exit')
+    parser.add_argument(
+        '--metrics-file',
+        help='Write the metrics in the Prometheus text format to this file at exit')
+    parser.add_argument(
+        '--record', metavar='ARCHIVE',
+        help='Append the raw response pages to this archive (gzip, or zstd '
+             'when it ends with .zst)')
+    parser.add_argument(
+        '--replay', metavar='ARCHIVE',
+        help='Read the response pages from this archive instead of the API, '
+             'no token is needed')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='yoshiki')
+    daemon_arguments(parser)
+    job_arguments(parser)
     sub_parser = parser.add_subparsers()
     [query.sub_parser(sub_parser) for query in queries]
+    [command.sub_parser(sub_parser) for command in commands]
+    Server.sub_parser(sub_parser)
+    return parser
+
+
+def build_job_parser() -> JobParser:
+    # A job only picks its query or command and its output, the daemon
+    # options are parsed to be refused
+    daemon = argparse.ArgumentParser(add_help=False)
+    daemon_arguments(daemon)
+    parser = JobParser(
+        prog='yoshiki-client', daemon=daemon.parse_args([]),
+        paths=('checkpoint_dir', 'names', 'node_table', 'output', 'snapshot'))
+    daemon_arguments(parser)
+    job_arguments(parser)
+    sub_parser = parser.add_subparsers()
+    [query.sub_parser(sub_parser) for query in queries]
+    [command.sub_parser(sub_parser) for command in commands]
+    return parser
+
 
+def main() -> None:
+    parser = build_parser()
     args = parser.parse_args()
-    if not getattr(args, 'query', None):
+    if not any(getattr(args, name, None) for name in ('query', 'command', 'serve')):
         parser.print_help()
         return
 
+    tokens = [token for value in args.token for token in value.split(',') if token]
+    if args.token_file:
+        with open(args.token_file) as f:
+            tokens += [line.strip() for line in f
+                       if line.strip() and not line.startswith('#')]
+    if not tokens and not args.replay:
+        parser.error('a --token or a --token-file is required')
+    if args.record and args.replay:
+        parser.error('--record and --replay can not be used together')
+
     logging.basicConfig(
         level=getattr(logging, args.loglevel.upper()))
 
-    gql = GithubGraphQLQuery(args.token)
+    cache = None
+    if args.cache_dir:
+        ttl: float = 3600
+        ttls: Dict[str, float] = {}
+        for value in args.cache_ttl:
+            if '=' in value:
+                kind, kind_ttl = value.split('=', 1)
+                ttls[kind] = float(kind_ttl)
+            else:
+                ttl = float(value)
+        cache = ResponseCache(
+            args.cache_dir, ttl, ttls, args.cache_size * 1024 * 1024)
+
+    archive = Archive(args.record) if args.record else None
+    replay = Archive(args.replay) if args.replay else None
+
+    events = Events()
+    metrics = Metrics()
+    if args.stats or args.metrics_file:
+        events.subscribe(metrics)
+    try:
+        gql = GithubGraphQLQuery(
+            # Replays do not send requests
+            tokens or ['replay'], cache=cache, events=events,
+            retry=RetryPolicy(attempts=args.max_attempts),
+            json_decoder=args.json_decoder,
+            transport=get_transport(args.transport, args.pool_size),
+            archive=archive, replay=replay, pipeline_depth=args.pipeline_depth,
+            shared_budget=args.shared_budget)
+        if getattr(args, 'serve', None):
+            Server(gql, build_job_parser(), output).serve(args.socket)
+        elif getattr(args, 'command', None):
+            args.command(gql.run_batch, args)
+        else:
+            output(gql, args)
+    finally:
+        if archive is not None:
+            archive.close()
+        if args.stats:
+            sys.stderr.write(metrics.summary() + '\n')
+        if args.metrics_file:
+            with open(args.metrics_file, 'w') as f:
+                f.write(metrics.prometheus())
+
+
+def output(gql: GithubGraphQLQuery, args: argparse.Namespace,
+           out: Optional[TextIO] = None) -> None:
+    out = out or sys.stdout
     query = args.query(args)
-    results = gql.run(query)
+    if args.page_size and query.page_size:
+        query.page_size.pin(args.page_size)
+    if args.resume:
+        pages = Checkpoint(args.checkpoint_dir, args.resume).iter_pages(
+            gql.iter_states, query)
+    else:
+        pages = gql.iter_pages(query)
+    if args.ndjson:
+        for page in pages:
+            for result in page:
+                out.write(json.dumps(result, default=json_default) + '\n')
+            out.flush()
+        return
+    results = query.sort(pages)
     if args.json:
-        print(json.dumps(results))
+        # Same output as json.dumps of the list, without building it
+        out.write('[')
+        for index, result in enumerate(results):
+            out.write((', ' if index else '') + json.dumps(result, default=json_default))
+        out.write(']\n')
+    elif args.csv:
+        write_csv(results, out)
     else:
         for result in results:
-            print(result)
-
+            out.write('%s\n' % (result,))
 
 if __name__ == "__main__":
     main()
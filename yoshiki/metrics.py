@@ -0,0 +1,146 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import bisect
+import logging
+from threading import Lock
+from typing import Any, Callable, Dict, List, Tuple
+
+# Events emitted by GithubGraphQLQuery:
+#   request: kind, status, seconds (network), bytes
+#   decode: kind, seconds
+#   cost: kind, cost
+#   wait: reason (pacing or reset), seconds
+#   transform: query, seconds, records
+#   cache: kind, hit
+#   retry: kind, reason, delay
+Listener = Callable[[str, Dict[str, Any]], None]
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Events(object):
+    log = logging.getLogger("yoshiki.Events")
+
+    def __init__(self) -> None:
+        self.listeners: List[Listener] = []
+
+    def subscribe(self, listener: Listener) -> None:
+        self.listeners.append(listener)
+
+    def emit(self, event: str, **data: Any) -> None:
+        for listener in self.listeners:
+            try:
+                listener(event, data)
+            except Exception:
+                self.log.exception("Listener failed on %s event" % event)
+
+
+class Histogram(object):
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics(object):
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        counter = self.counters.setdefault(name, {})
+        counter[key] = counter.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        self.histograms.setdefault(name, {}).setdefault(key, Histogram()).observe(value)
+
+    def __call__(self, event: str, data: Dict[str, Any]) -> None:
+        with self.lock:
+            if event == 'request':
+                self.inc('yoshiki_requests_total', kind=data['kind'], status=data['status'])
+                self.inc('yoshiki_response_bytes_total', data['bytes'], kind=data['kind'])
+                self.observe('yoshiki_request_seconds', data['seconds'], kind=data['kind'])
+            elif event == 'decode':
+                self.observe('yoshiki_decode_seconds', data['seconds'], kind=data['kind'])
+            elif event == 'cost':
+                self.inc('yoshiki_cost_points_total', data['cost'], kind=data['kind'])
+            elif event == 'wait':
+                self.inc('yoshiki_rate_limit_wait_seconds_total', data['seconds'],
+                         reason=data['reason'])
+            elif event == 'transform':
+                self.observe('yoshiki_transform_seconds', data['seconds'], query=data['query'])
+                self.inc('yoshiki_records_total', data['records'], query=data['query'])
+            elif event == 'cache':
+                self.inc('yoshiki_cache_%s_total' % ('hits' if data['hit'] else 'misses'),
+                         kind=data['kind'])
+            elif event == 'retry':
+                self.inc('yoshiki_retries_total', kind=data['kind'], reason=data['reason'])
+                self.inc('yoshiki_retry_wait_seconds_total', data['delay'], kind=data['kind'])
+
+    @staticmethod
+    def labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        items = labels + extra
+        if not items:
+            return ''
+        return '{%s}' % ','.join('%s="%s"' % (k, v.replace('"', '\\"')) for k, v in items)
+
+    def prometheus(self) -> str:
+        lines: List[str] = []
+        with self.lock:
+            for name, values in sorted(self.counters.items()):
+                lines.append('# TYPE %s counter' % name)
+                for labels, value in sorted(values.items()):
+                    lines.append('%s%s %s' % (name, self.labels(labels), value))
+            for name, histograms in sorted(self.histograms.items()):
+                lines.append('# TYPE %s histogram' % name)
+                for labels, histogram in sorted(histograms.items()):
+                    cumulative = 0
+                    for bound, count in zip(
+                            list(map(str, Histogram.buckets)) + ['+Inf'], histogram.counts):
+                        cumulative += count
+                        lines.append('%s_bucket%s %s' % (
+                            name, self.labels(labels, (('le', bound),)), cumulative))
+                    lines.append('%s_sum%s %s' % (name, self.labels(labels), histogram.sum))
+                    lines.append('%s_count%s %s' % (name, self.labels(labels), histogram.count))
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> str:
+        lines: List[str] = []
+        with self.lock:
+            for name, histograms in sorted(self.histograms.items()):
+                for labels, histogram in sorted(histograms.items()):
+                    lines.append('%s%s: count %s, total %.3fs, mean %.3fs' % (
+                        name, self.labels(labels), histogram.count, histogram.sum,
+                        histogram.sum / histogram.count if histogram.count else 0))
+            for name, values in sorted(self.counters.items()):
+                for labels, value in sorted(values.items()):
+                    lines.append('%s%s: %s' % (name, self.labels(labels), round(value, 3)))
+        return '\n'.join(lines)
@@ -0,0 +1,62 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+
+class NodeTable(object):
+    # The GraphQL node ids of known repositories (nameWithOwner) and users
+    # (login), kept in an append only tab separated file: kind, name, id
+    log = logging.getLogger("yoshiki.NodeTable")
+
+    def __init__(self, path: str) -> None:
+        self.path = os.path.expanduser(path)
+        self.ids: Dict[Tuple[str, str], str] = {}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    kind, name, node_id = line.rstrip('\n').split('\t')
+                    # Later lines override, an empty id forgets the node
+                    self.ids[(kind, name.lower())] = node_id
+        self.log.debug("%s node ids read from %s" % (len(self.ids), self.path))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, kind: str, name: str) -> Optional[str]:
+        # Github names are case insensitive
+        return self.ids.get((kind, name.lower())) or None
+
+    def add(self, kind: str, name: str, node_id: str) -> None:
+        if self.ids.get((kind, name.lower())) == node_id:
+            return
+        self.ids[(kind, name.lower())] = node_id
+        with open(self.path, 'a') as f:
+            f.write('%s\t%s\t%s\n' % (kind, name, node_id))
+
+    def forget(self, kind: str, name: str) -> None:
+        if self.get(kind, name) is not None:
+            self.add(kind, name, '')
@@ -0,0 +1,85 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+
+class PageSize(object):
+    # Page size (first) of a paginated query: grow it while responses are fast
+    # and small, shrink it when they get slow, large or time out. Growth stops
+    # at the size with the least rate limit points per record seen so far.
+    log = logging.getLogger("yoshiki.PageSize")
+
+    def __init__(self, first: int = 100, minimum: int = 5, maximum: int = 100,
+                 target: float = 5.0, max_bytes: int = 4 * 1024 * 1024) -> None:
+        self.first = first
+        self.minimum = min(minimum, first)
+        self.maximum = maximum
+        self.ceiling = maximum
+        # Target response time in seconds (well under the request timeout)
+        # and response size in bytes
+        self.target = target
+        self.max_bytes = max_bytes
+        # Points per record and page size of the cheapest page seen
+        self.best: Optional[Tuple[float, int]] = None
+
+    def pin(self, first: int) -> None:
+        self.first = self.minimum = self.maximum = self.ceiling = first
+
+    def resize(self, first: int) -> None:
+        first = max(self.minimum, min(self.ceiling, first))
+        if first != self.first:
+            self.log.debug("Page size %s -> %s" % (self.first, first))
+            self.first = first
+
+    def observe(self, seconds: float, cost: Optional[int], size: int) -> None:
+        if cost:
+            points = cost / self.first
+            if self.best is None or points < self.best[0]:
+                self.best = (points, self.first)
+            elif points > self.best[0] * 1.25 and self.first > self.best[1]:
+                # Larger pages are charged more points per record
+                self.ceiling = self.best[1]
+        scale = min(self.target / max(seconds, 0.001), self.max_bytes / max(size, 1))
+        if scale < 1:
+            # Keep a margin under the target
+            self.resize(int(self.first * scale * 0.8))
+        elif scale >= 2:
+            self.resize(self.first * 3 // 2 + 1)
+        else:
+            self.resize(self.first)
+
+    def shrink(self) -> bool:
+        # Called on a timeout, return False when the page can not be smaller
+        if self.first <= self.minimum:
+            return False
+        self.ceiling = max(self.minimum, self.first * 3 // 4)
+        self.resize(self.first // 2)
+        self.log.info("Request timed out, page size reduced to %s" % self.first)
+        return True
+
+    def state(self) -> Dict[str, Any]:
+        return dict(first=self.first, ceiling=self.ceiling)
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        self.first = state['first']
+        self.ceiling = state['ceiling']
@@ -0,0 +1,103 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Any, Callable, Iterable, Iterator, List, Sequence
+
+# Marks the end of the items in a queue
+DONE = object()
+
+
+class Failure(object):
+    # An exception raised in a stage, re-raised by the consumer
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def pipeline(source: Iterable[Any], stages: Sequence[Callable[[Any], Any]],
+             depth: int = 4) -> Iterator[Any]:
+    # Iterate source and map its items through each stage, every one in its
+    # own thread and connected by queues of depth items, so that a stage
+    # works on the next item while the following ones process the previous.
+    stop = Event()
+    queues: List['Queue[Any]'] = [Queue(depth) for _ in range(len(stages) + 1)]
+
+    def put(queue: 'Queue[Any]', item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def get(queue: 'Queue[Any]') -> Any:
+        while not stop.is_set():
+            try:
+                return queue.get(timeout=0.1)
+            except Empty:
+                pass
+        return DONE
+
+    def produce() -> None:
+        try:
+            for item in source:
+                if not put(queues[0], item):
+                    return
+        except BaseException as e:
+            put(queues[0], Failure(e))
+            return
+        put(queues[0], DONE)
+
+    def work(stage: Callable[[Any], Any], inbox: 'Queue[Any]', outbox: 'Queue[Any]') -> None:
+        while True:
+            item = get(inbox)
+            if item is DONE or isinstance(item, Failure):
+                put(outbox, item)
+                return
+            try:
+                item = stage(item)
+            except BaseException as e:
+                put(outbox, Failure(e))
+                return
+            if not put(outbox, item):
+                return
+
+    threads = [Thread(target=produce, daemon=True)] + [
+        Thread(target=work, args=(stage, queues[index], queues[index + 1]), daemon=True)
+        for index, stage in enumerate(stages)]
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            item = queues[-1].get()
+            if item is DONE:
+                return
+            if isinstance(item, Failure):
+                raise item.error
+            yield item
+    finally:
+        # Stop the stages when the consumer is done or closed early, the
+        # source finishes its current item first
+        stop.set()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,227 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import calendar
+import hashlib
+import importlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from . helpers import Raw
+
+
+def parse_reset(reset_at: str) -> float:
+    return calendar.timegm(
+        datetime.strptime(reset_at, '%Y-%m-%dT%H:%M:%SZ').timetuple())
+
+
+class TokenBucket(object):
+    # Spread the remaining points evenly until the reset. Up to burst points
+    # can be spent at once, and reserve points are never spent.
+    def __init__(self, burst: float = 1000, reserve: int = 150) -> None:
+        self.burst = burst
+        self.reserve = reserve
+        self.remaining = 5000
+        self.reset = time.time() + 3600
+        self.tokens = burst
+        self.updated = time.time()
+        # Points consumed by requests still in flight
+        self.pending: float = 0
+
+    def update(self, rate_limit: Raw) -> None:
+        self.remaining = int(rate_limit['remaining'] - self.pending)
+        self.reset = parse_reset(rate_limit['resetAt'])
+
+    def exhaust(self, reset: float) -> None:
+        self.remaining = 0
+        self.reset = reset
+
+    def rate(self, now: float) -> float:
+        return max(self.remaining - self.reserve, 0) / max(self.reset - now, 1)
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(
+            self.burst, self.tokens + (now - self.updated) * self.rate(now))
+        self.updated = now
+
+    def exhausted(self, cost: float = 1) -> bool:
+        return self.remaining - cost < self.reserve
+
+    def delay(self, cost: float = 1, now: Optional[float] = None) -> float:
+        now = now or time.time()
+        if self.exhausted(cost):
+            return max(self.reset - now, 0) + 1
+        self.refill(now)
+        if self.tokens >= cost:
+            return 0
+        return (cost - self.tokens) / self.rate(now)
+
+    def consume(self, cost: float = 1) -> None:
+        self.refill(time.time())
+        self.tokens -= cost
+        self.remaining -= int(cost)
+        self.pending += cost
+
+    def settle(self, cost: float = 1) -> None:
+        self.pending -= cost
+
+    def acquire(self, cost: float = 1) -> float:
+        # Consume the points when they can be spent now, or return the delay
+        delay = self.delay(cost)
+        if not delay:
+            self.consume(cost)
+        return delay
+
+
+class SharedTokenBucket(TokenBucket):
+    # A token bucket shared by the processes of the host using the same
+    # token: its state is kept in a file and every operation runs under an
+    # exclusive lock of the file, after reading and before writing it.
+    def __init__(self, path: str, burst: float = 1000, reserve: int = 150) -> None:
+        super().__init__(burst, reserve)
+        try:
+            self.fcntl: Any = importlib.import_module('fcntl')
+        except ImportError:
+            raise Exception("A shared budget needs file locks (fcntl)")
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        # Points in flight of each process, to drop the ones of dead processes
+        self.owner = '%d:%d' % (os.getpid(), id(self))
+        self.pendings: Dict[str, float] = {}
+        self.depth = 0
+
+    @staticmethod
+    def alive(owner: str) -> bool:
+        try:
+            os.kill(int(owner.split(':')[0]), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def load(self) -> None:
+        size = os.fstat(self.fd).st_size
+        if not size:
+            return
+        state = json.loads(os.pread(self.fd, size, 0))
+        self.remaining = state['remaining']
+        self.reset = state['reset']
+        self.tokens = state['tokens']
+        self.updated = state['updated']
+        self.pendings = dict(
+            (owner, points) for owner, points in state['pendings'].items()
+            if owner == self.owner or self.alive(owner))
+        self.pending = sum(self.pendings.values())
+
+    def save(self) -> None:
+        data = json.dumps(dict(
+            remaining=self.remaining, reset=self.reset, tokens=self.tokens,
+            updated=self.updated, pendings=self.pendings)).encode()
+        os.ftruncate(self.fd, 0)
+        os.pwrite(self.fd, data, 0)
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        if self.depth:
+            yield
+            return
+        self.fcntl.flock(self.fd, self.fcntl.LOCK_EX)
+        self.depth += 1
+        try:
+            self.load()
+            yield
+            self.save()
+        finally:
+            self.depth -= 1
+            self.fcntl.flock(self.fd, self.fcntl.LOCK_UN)
+
+    def update(self, rate_limit: Raw) -> None:
+        with self.shared():
+            super().update(rate_limit)
+
+    def exhaust(self, reset: float) -> None:
+        with self.shared():
+            super().exhaust(reset)
+
+    def delay(self, cost: float = 1, now: Optional[float] = None) -> float:
+        with self.shared():
+            return super().delay(cost, now)
+
+    def acquire(self, cost: float = 1) -> float:
+        # No other process can spend the points between the check and the debit
+        with self.shared():
+            return super().acquire(cost)
+
+    def consume(self, cost: float = 1) -> None:
+        with self.shared():
+            super().consume(cost)
+            self.pendings[self.owner] = self.pendings.get(self.owner, 0) + cost
+
+    def settle(self, cost: float = 1) -> None:
+        with self.shared():
+            super().settle(cost)
+            self.pendings[self.owner] = self.pendings.get(self.owner, 0) - cost
+            if self.pendings[self.owner] <= 0:
+                del self.pendings[self.owner]
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def budget_path(directory: str, token: str) -> str:
+    # Tokens are not written to disk, only a hash of them
+    directory = os.path.expanduser(directory)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(
+        directory, hashlib.sha256(token.encode()).hexdigest()[:16] + '.json')
+
+
+class TokenPool(object):
+    # Route each query to the token able to spend the points the soonest,
+    # preferring the one with the most remaining points.
+    def __init__(self, tokens: List[str], burst: float = 1000,
+                 reserve: int = 150, shared: Optional[str] = None) -> None:
+        if not tokens:
+            raise Exception("At least one token is needed")
+        # With a shared directory the budgets are shared with the other
+        # processes of the host
+        self.buckets: Dict[str, TokenBucket] = dict(
+            (token, SharedTokenBucket(budget_path(shared, token), burst, reserve)
+             if shared else TokenBucket(burst, reserve)) for token in tokens)
+
+    @property
+    def remaining(self) -> int:
+        return sum(bucket.remaining for bucket in self.buckets.values())
+
+    @property
+    def reset(self) -> float:
+        return min(bucket.reset for bucket in self.buckets.values())
+
+    def select(self, cost: float = 1, now: Optional[float] = None) -> str:
+        now = now or time.time()
+        return min(self.buckets, key=lambda token: (
+            self.buckets[token].delay(cost, now),
+            -self.buckets[token].remaining))
@@ -0,0 +1,141 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import csv
+import importlib
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, TextIO, Tuple, Type
+
+
+class Record(Mapping[str, Any]):
+    # A read only mapping storing its fields in slots instead of a dict
+    __slots__: Tuple[str, ...] = ()
+
+    def __init__(self, **fields: Any) -> None:
+        for field in self.__slots__:
+            setattr(self, field, fields[field])
+
+    def __getitem__(self, field: str) -> Any:
+        if field not in self.__slots__:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict((field, getattr(self, field)) for field in self.__slots__)
+
+
+def record_type(name: str, fields: Sequence[str]) -> Type[Record]:
+    return type(name, (Record,), {'__slots__': tuple(fields)})
+
+
+RepositoryRecord = record_type('RepositoryRecord', (
+    'name', 'owner', 'default_branch', 'description', 'stars', 'stargazers',
+    'forks', 'watchers', 'topics'))
+UserRecord = record_type('UserRecord', ('name', 'login'))
+StargazerRecord = record_type('StargazerRecord', ('name', 'login', 'starred_at'))
+
+
+def json_default(obj: Any) -> Any:
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError("%s is not JSON serializable" % type(obj).__name__)
+
+
+def csv_value(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return ' '.join(map(str, value))
+    return value
+
+
+def write_csv(results: Iterable[Mapping[str, Any]], f: TextIO) -> None:
+    writer = csv.writer(f)
+    fields: List[str] = []
+    for result in results:
+        if not result:
+            continue
+        if not fields:
+            fields = list(result)
+            writer.writerow(fields)
+        writer.writerow([csv_value(result.get(field)) for field in fields])
+
+
+class RecordBatch(object):
+    # Columnar storage: integers are packed in arrays and strings, including
+    # the ones in tuples such as topics, are interned in a shared table.
+    def __init__(self, record: Type[Record]) -> None:
+        self.record = record
+        self.columns: Dict[str, Any] = {}
+        self.strings: Dict[str, str] = {}
+        self.size = 0
+
+    def intern(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self.strings.setdefault(value, value)
+        if isinstance(value, (list, tuple)):
+            return tuple(self.intern(item) for item in value)
+        return value
+
+    def append(self, result: Mapping[str, Any]) -> None:
+        if not result:
+            return
+        for field in self.record.__slots__:
+            value = result[field]
+            column = self.columns.get(field)
+            if column is None:
+                column = self.columns[field] = (
+                    array('q') if isinstance(value, int) else [])
+            column.append(self.intern(value))
+        self.size += 1
+
+    def extend(self, results: Iterable[Mapping[str, Any]]) -> None:
+        for result in results:
+            self.append(result)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[Record]:
+        fields = self.record.__slots__
+        for index in range(self.size):
+            yield self.record(**dict(
+                (field, self.columns[field][index]) for field in fields))
+
+    def to_csv(self, f: TextIO) -> None:
+        write_csv(self, f)
+
+    def to_numpy(self) -> Dict[str, Any]:
+        try:
+            numpy = importlib.import_module('numpy')
+        except ImportError:
+            raise Exception("numpy is required to export numpy columns")
+        return dict(
+            (field, numpy.frombuffer(column, dtype=numpy.int64)
+             if isinstance(column, array) else numpy.array(column, dtype=object))
+            for field, column in self.columns.items())
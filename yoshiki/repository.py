@@ -20,10 +20,14 @@
 # SOFTWARE.
 
 import argparse
+import json
 import logging
-import textwrap
+import os
+from typing import Any, Optional, Set
 
+from . builder import PAGE_VARIABLES, compile_query
 from . helpers import PaginatedQuery, Raw, Result, Results
+from . records import StargazerRecord, json_default
 from . user import User
 
 
@@ -34,13 +38,11 @@ class Repository(PaginatedQuery):
     def __init__(self, args: argparse.Namespace) -> None:
         super().__init__()
         self.repository: str = args.repository
-
-    def graph_query(self) -> str:
-        return textwrap.dedent(
+        self.document = compile_query(
         """
         {
-          repository(name: "%(name)s", owner: "%(owner)s") {
-            %(connection)s(first: 100%(after)s) {
+          repository(name: %(name)s, owner: %(owner)s) {
+            %(connection)s(first: $first, after: $after) {
               pageInfo {
                 hasNextPage endCursor
               }
@@ -53,22 +55,28 @@ class Repository(PaginatedQuery):
             }
           }
         }
-        """ % dict(after=', after: "%s"' % self.after if self.after else '',
-                   owner=self.repository.split('/')[0],
-                   name=self.repository.split('/')[1],
-                   connection=self.connection))
-
-    def transform_result(self, raw: Raw) -> Results:
-        edges = raw['data']['repository'][self.connection]['edges']
-        if not self.count:
-            self.count = len(edges)
+        """ % dict(owner=json.dumps(self.repository.split('/')[0]),
+                   name=json.dumps(self.repository.split('/')[1]),
+                   connection=self.connection), PAGE_VARIABLES)
+
+    def graph_query(self) -> str:
+        return self.document
+
+    def paginate(self, raw: Raw) -> Any:
+        if self.count is None:
+            self.count = 0
         pageInfo = raw['data']['repository'][self.connection]['pageInfo']
         if pageInfo['hasNextPage']:
             self.after = pageInfo['endCursor']
         else:
             self.after = ''
+        return raw['data']['repository'][self.connection]['edges']
+
+    def extract(self, edges: Any) -> Results:
+        users = [user for user in [User.strip(edge) for edge in edges] if user]
+        self.count = (self.count or 0) + len(users)
         self.log.info(f"{self.count} {self.connection} read")
-        return [user for user in [User.strip(edge) for edge in edges] if edges]
+        return users
 
 
 class Stargazers(Repository):
@@ -79,6 +87,89 @@ class Stargazers(Repository):
         sub = parser.add_parser(f"list-stargazers")
         sub.set_defaults(query=Stargazers)
         sub.add_argument('--repository', help='The repository name', required=True)
+        sub.add_argument(
+            '--snapshot',
+            help='Only read the stargazers newer than the ones stored in this '
+                 'file, then add them to it')
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        super().__init__(args)
+        self.snapshot: Optional[str] = getattr(args, 'snapshot', None)
+        # The most recent star date of the snapshot and the logins starred then
+        self.newest = ''
+        self.known: Set[str] = set()
+        self.delta: Results = []
+        if self.snapshot and os.path.exists(self.snapshot):
+            with open(self.snapshot) as f:
+                for line in f:
+                    stargazer = json.loads(line)
+                    if stargazer['starred_at'] > self.newest:
+                        self.newest = stargazer['starred_at']
+                        self.known = set()
+                    if stargazer['starred_at'] == self.newest:
+                        self.known.add(stargazer['login'])
+            self.log.info(f"Reading stargazers of {self.repository} since {self.newest}")
+        if self.snapshot:
+            self.document = compile_query(
+            """
+            {
+              repository(name: %(name)s, owner: %(owner)s) {
+                stargazers(first: $first, after: $after, orderBy: {field: STARRED_AT, direction: DESC}) {
+                  pageInfo {
+                    hasNextPage endCursor
+                  }
+                  edges {
+                    starredAt
+                    node {
+                      name
+                      login
+                    }
+                  }
+                }
+              }
+            }
+            """ % dict(owner=json.dumps(self.repository.split('/')[0]),
+                       name=json.dumps(self.repository.split('/')[1])), PAGE_VARIABLES)
+
+    def paginate(self, raw: Raw) -> Any:
+        if not self.snapshot:
+            return super().paginate(raw)
+        # The stop condition depends on the stargazers, read them right away
+        edges = raw['data']['repository']['stargazers']['edges']
+        pageInfo = raw['data']['repository']['stargazers']['pageInfo']
+        stargazers: Results = []
+        for edge in edges:
+            starred_at = edge['starredAt']
+            if starred_at < self.newest or (
+                    starred_at == self.newest and edge['node']['login'] in self.known):
+                # Stop at the first stargazer already in the snapshot
+                pageInfo = dict(hasNextPage=False)
+                break
+            stargazers.append(StargazerRecord(
+                name=edge['node']['name'], login=edge['node']['login'],
+                starred_at=starred_at))
+        self.count = (self.count or 0) + len(stargazers)
+        if pageInfo['hasNextPage']:
+            self.after = pageInfo['endCursor']
+        else:
+            self.after = ''
+        self.delta += stargazers
+        if not self.after:
+            self.save()
+        return stargazers
+
+    def extract(self, page: Any) -> Results:
+        if not self.snapshot:
+            return super().extract(page)
+        return list(page)
+
+    def save(self) -> None:
+        assert self.snapshot
+        with open(self.snapshot, 'a') as f:
+            for stargazer in self.delta:
+                f.write(json.dumps(stargazer, default=json_default) + '\n')
+        self.log.info(f"{len(self.delta)} new stargazers added to {self.snapshot}")
+        self.delta = []
 
 
 class Watchers(Repository):
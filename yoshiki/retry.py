@@ -0,0 +1,138 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import random
+import time
+from threading import Lock
+from typing import Callable, Dict, Mapping, Optional
+
+from . helpers import Raw
+
+
+class GraphQLError(Exception):
+    pass
+
+
+class FatalError(GraphQLError):
+    pass
+
+
+class RetryableError(GraphQLError):
+    def __init__(self, message: str, reason: str,
+                 retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RateLimitedError(RetryableError):
+    # The token quota is exhausted until reset (epoch)
+    def __init__(self, message: str, reset: float) -> None:
+        super().__init__(message, 'rate_limited')
+        self.reset = reset
+
+
+def status_error(status: int, headers: Mapping[str, str], text: str) -> GraphQLError:
+    retry_after = headers.get('Retry-After')
+    if status in (403, 429):
+        if headers.get('X-RateLimit-Remaining') == '0' and headers.get('X-RateLimit-Reset'):
+            return RateLimitedError(
+                "Rate limited: %s" % text, float(headers['X-RateLimit-Reset']))
+        if retry_after or 'secondary rate limit' in text.lower():
+            # Without a Retry-After header Github asks to wait at least a minute
+            return RetryableError(
+                "Secondary rate limit: %s" % text, 'secondary',
+                float(retry_after) if retry_after else 60)
+    if status >= 500:
+        return RetryableError(
+            "Server error %s see: %s" % (status, text[:500]), 'server')
+    return FatalError("No ok response code %s see: %s" % (status, text))
+
+
+def payload_error(ret: Raw, headers: Mapping[str, str],
+                  ignore_not_found: bool = False) -> Optional[GraphQLError]:
+    errors = ret['errors']
+    types = set(error.get('type') for error in errors)
+    if 'RATE_LIMITED' in types:
+        reset = headers.get('X-RateLimit-Reset')
+        return RateLimitedError(
+            "Rate limited: %s" % json.dumps(errors),
+            float(reset) if reset else time.time() + 60)
+    if types == {'NOT_FOUND'} and ignore_not_found:
+        return None
+    if not ret.get('data') and types == {None} and any(
+            'timeout' in error.get('message', '').lower() or
+            'something went wrong' in error.get('message', '').lower()
+            for error in errors):
+        return RetryableError(
+            "Query failed on the server side: %s" % json.dumps(errors), 'timeout')
+    return FatalError("Errors in response see: %s" % json.dumps(errors))
+
+
+class RetryPolicy(object):
+    # Exponential backoff with full jitter, Retry-After takes precedence
+    def __init__(self, attempts: int = 8, base: float = 1.0, cap: float = 120.0,
+                 jitter: Callable[[float, float], float] = random.uniform) -> None:
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+        self.jitter = jitter
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return retry_after
+        return self.jitter(0, min(self.cap, self.base * 2 ** attempt))
+
+
+class CircuitBreaker(object):
+    # Open the circuit of an endpoint after threshold consecutive failures:
+    # requests then wait for the cooldown and a single one probes the endpoint.
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures: Dict[str, int] = {}
+        self.opened: Dict[str, float] = {}
+        self.lock = Lock()
+
+    def wait(self, endpoint: str, now: Optional[float] = None) -> float:
+        now = now or time.monotonic()
+        with self.lock:
+            opened = self.opened.get(endpoint)
+            if opened is None:
+                return 0
+            remaining = opened + self.cooldown - now
+            if remaining <= 0:
+                # Let this request probe the endpoint and hold the others
+                self.opened[endpoint] = now
+                return 0
+            return remaining
+
+    def failure(self, endpoint: str) -> None:
+        with self.lock:
+            self.failures[endpoint] = self.failures.get(endpoint, 0) + 1
+            if self.failures[endpoint] >= self.threshold:
+                self.opened[endpoint] = time.monotonic()
+
+    def success(self, endpoint: str) -> None:
+        with self.lock:
+            self.failures.pop(endpoint, None)
+            self.opened.pop(endpoint, None)
@@ -0,0 +1,157 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import io
+import json
+import logging
+import os
+import socket
+import socketserver
+from typing import Any, Callable, List, Optional, TextIO, Tuple
+
+from . client import EXIT, OUTPUT, default_socket, write_frame
+
+# Runs the query or command of parsed arguments, writing the output to a file
+Output = Callable[[Any, argparse.Namespace, TextIO], None]
+
+
+class JobParser(argparse.ArgumentParser):
+    # Report the argument errors of a job instead of exiting the daemon
+    def __init__(self, *args: Any, daemon: Optional[argparse.Namespace] = None,
+                 paths: Tuple[str, ...] = (), **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # The defaults of the options set when the daemon starts
+        self.daemon = daemon or argparse.Namespace()
+        # The options naming files, relative to the directory of the client
+        self.paths = paths
+
+    def error(self, message: str) -> Any:
+        raise Exception(message)
+
+    def exit(self, status: int = 0, message: Optional[str] = None) -> Any:
+        raise Exception(message or "exit %s" % status)
+
+    def print_help(self, file: Any = None) -> None:
+        # Sent to the client instead of the output of the daemon
+        raise Exception(self.format_help())
+
+    def parse_job(self, argv: List[str], cwd: str) -> argparse.Namespace:
+        args = self.parse_args(argv)
+        for name, default in vars(self.daemon).items():
+            if getattr(args, name) != default:
+                raise Exception("--%s is a daemon option, it is set when yoshiki serve starts"
+                                % name.replace('_', '-'))
+        for name in self.paths:
+            value = getattr(args, name, None)
+            if value == '-':
+                raise Exception("--%s - would read the standard input of the daemon, "
+                                "pass a file instead" % name.replace('_', '-'))
+            if value:
+                setattr(args, name, os.path.join(cwd, os.path.expanduser(value)))
+        return args
+
+
+class Frames(io.RawIOBase):
+    # The output of a job, sent to the client in frames
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        write_frame(self.sock, OUTPUT, bytes(data))
+        return len(data)
+
+
+class Server(object):
+    # Run the jobs of clients with the same GithubGraphQLQuery: its
+    # connections, token budgets and cache stay warm between jobs
+    log = logging.getLogger("yoshiki.Server")
+
+    @staticmethod
+    def sub_parser(parser: argparse._SubParsersAction) -> None:
+        sub = parser.add_parser("serve")
+        sub.set_defaults(serve=True)
+        sub.add_argument(
+            '--socket', default=default_socket(),
+            help='The unix socket accepting the jobs (yoshiki-client)')
+
+    def __init__(self, gql: Any, parser: JobParser, output: Output) -> None:
+        self.gql = gql
+        self.parser = parser
+        self.output = output
+        self.jobs = 0
+        self.unix_server: Optional[socketserver.ThreadingUnixStreamServer] = None
+
+    def job(self, sock: socket.socket) -> None:
+        out = io.TextIOWrapper(io.BufferedWriter(Frames(sock)), encoding='utf-8')
+        status: Any = dict(status=0)
+        try:
+            with sock.makefile('rb') as f:
+                request = json.loads(f.readline())
+            args = self.parser.parse_job(request['argv'], request['cwd'])
+            self.jobs += 1
+            self.log.info("Job %s: %s" % (self.jobs, ' '.join(request['argv'])))
+            if getattr(args, 'command', None):
+                args.command(self.gql.run_batch, args)
+            elif getattr(args, 'query', None):
+                self.output(self.gql, args, out)
+            else:
+                raise Exception("A query or a command is required")
+            out.flush()
+        except Exception as e:
+            self.log.exception("Job failed")
+            status = dict(status=1, error=str(e))
+        try:
+            out.flush()
+            write_frame(sock, EXIT, json.dumps(status).encode())
+        except OSError:
+            self.log.warning("Client gone before the end of its job")
+
+    def serve(self, path: str) -> None:
+        server = self
+
+        class handler(socketserver.BaseRequestHandler):
+            def handle(self) -> None:
+                server.job(self.request)
+
+        path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if os.path.exists(path):
+            os.unlink(path)
+        with socketserver.ThreadingUnixStreamServer(path, handler) as unix_server:
+            unix_server.daemon_threads = True
+            self.unix_server = unix_server
+            # Jobs use the tokens of the daemon
+            os.chmod(path, 0o600)
+            self.log.info("Serving on %s" % path)
+            try:
+                unix_server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os.unlink(path)
+
+    def stop(self) -> None:
+        if self.unix_server is not None:
+            self.unix_server.shutdown()
@@ -0,0 +1,126 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import heapq
+import json
+import os
+import tempfile
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from . helpers import Result, Results
+from . records import json_default
+
+Key = Callable[[Result], Any]
+
+
+class TopK(object):
+    # Keep the k largest records in a heap, the first ones read win the ties
+    def __init__(self, k: int, key: Key) -> None:
+        self.k = k
+        self.key = key
+        self.heap: List[Tuple[Any, int, Result]] = []
+        self.count = 0
+
+    def extend(self, results: Iterable[Result]) -> None:
+        for result in results:
+            self.count += 1
+            item = (self.key(result), -self.count, result)
+            if len(self.heap) < self.k:
+                heapq.heappush(self.heap, item)
+            elif self.heap and item[:2] > self.heap[0][:2]:
+                heapq.heapreplace(self.heap, item)
+
+    def results(self) -> Results:
+        return [result for _, _, result in sorted(
+            self.heap, key=lambda item: item[:2], reverse=True)]
+
+
+class ExternalSort(object):
+    # Sort more records than fit in memory: runs of buffer records are sorted
+    # and spilled to temporary files, then merged when iterated. Spilled
+    # records are read back as dicts.
+    def __init__(self, key: Key, reverse: bool = False, buffer: int = 100000,
+                 directory: Optional[str] = None) -> None:
+        self.key = key
+        self.reverse = reverse
+        self.buffer_size = buffer
+        self.directory = directory
+        self.buffer: Results = []
+        self.runs: List[str] = []
+        self.tmpdir: Optional[tempfile.TemporaryDirectory[str]] = None
+
+    def extend(self, results: Iterable[Result]) -> None:
+        for result in results:
+            self.buffer.append(result)
+            if len(self.buffer) >= self.buffer_size:
+                self.spill()
+
+    def spill(self) -> None:
+        if self.tmpdir is None:
+            self.tmpdir = tempfile.TemporaryDirectory(prefix='yoshiki-sort-', dir=self.directory)
+        path = os.path.join(self.tmpdir.name, 'run%d.ndjson' % len(self.runs))
+        with open(path, 'w') as f:
+            for result in sorted(self.buffer, key=self.key, reverse=self.reverse):
+                f.write(json.dumps(result, default=json_default) + '\n')
+        self.runs.append(path)
+        self.buffer = []
+
+    @staticmethod
+    def read(path: str) -> Iterator[Result]:
+        with open(path) as f:
+            for line in f:
+                yield json.loads(line)
+
+    def __iter__(self) -> Iterator[Result]:
+        # Runs are merged in the order they were read to keep the sort stable
+        try:
+            yield from heapq.merge(
+                *[self.read(path) for path in self.runs],
+                sorted(self.buffer, key=self.key, reverse=self.reverse),
+                key=self.key, reverse=self.reverse)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self.tmpdir is not None:
+            self.tmpdir.cleanup()
+            self.tmpdir = None
+        self.runs = []
+        self.buffer = []
+
+
+def rank(pages: Iterable[Results], key: Key, top: Optional[int] = None,
+         buffer: Optional[int] = None) -> Iterator[Result]:
+    # Read all the pages and return the records in decreasing key order: only
+    # the top ones when top is set, spilling to disk every buffer records
+    # when buffer is set and all in memory otherwise
+    if top is not None:
+        heap = TopK(top, key)
+        for page in pages:
+            heap.extend(page)
+        return iter(heap.results())
+    if buffer is None:
+        return iter(sorted((result for page in pages for result in page),
+                           key=key, reverse=True))
+    runs = ExternalSort(key, reverse=True, buffer=buffer)
+    for page in pages:
+        runs.extend(page)
+    return iter(runs)
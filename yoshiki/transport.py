@@ -0,0 +1,132 @@
+# MIT License
+# Copyright (c) 2020 YoShiKi
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import importlib
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Mapping, Tuple
+
+import requests
+import requests.adapters
+
+from . retry import RetryableError
+
+# Status, headers and body of a response
+Response = Tuple[int, Mapping[str, str], bytes]
+
+
+class Transport(ABC):
+    @abstractmethod
+    def post(self, url: str, body: bytes, headers: Dict[str, str]) -> Response:
+        ...
+
+    def resize(self, pool_size: int) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class RequestsTransport(Transport):
+    def __init__(self, pool_size: int = 10, timeout: float = 30.3) -> None:
+        self.timeout = timeout
+        self.session = requests.session()
+        self.session.headers['Accept-Encoding'] = 'gzip'
+        self.pool_size = 0
+        self.resize(pool_size)
+
+    def resize(self, pool_size: int) -> None:
+        # Keep alive connections, one per concurrent request
+        if pool_size == self.pool_size:
+            return
+        self.pool_size = pool_size
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def post(self, url: str, body: bytes, headers: Dict[str, str]) -> Response:
+        try:
+            r = self.session.post(url=url, data=body, headers=headers, timeout=self.timeout)
+        except requests.exceptions.Timeout as e:
+            raise RetryableError("Request timeout: %s" % e, 'timeout')
+        except requests.exceptions.ConnectionError as e:
+            raise RetryableError("Connection error: %s" % e, 'connection')
+        return r.status_code, r.headers, r.content
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class HttpxTransport(Transport):
+    # Multiplex the requests over HTTP/2 connections, needs httpx[http2]
+
+    def __init__(self, pool_size: int = 10, timeout: float = 30.3, http2: bool = True) -> None:
+        try:
+            self.httpx = importlib.import_module('httpx')
+            if http2:
+                importlib.import_module('h2')
+        except ImportError:
+            raise Exception("httpx[http2] is required by the http2 transport")
+        self.timeout = timeout
+        self.http2 = http2
+        self.client: Any = None
+        self.pool_size = 0
+        self.resize(pool_size)
+
+    def resize(self, pool_size: int) -> None:
+        if pool_size == self.pool_size:
+            return
+        self.pool_size = pool_size
+        if self.client is not None:
+            self.client.close()
+        self.client = self.httpx.Client(
+            http2=self.http2, timeout=self.timeout, headers={'Accept-Encoding': 'gzip'},
+            limits=self.httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size))
+
+    def post(self, url: str, body: bytes, headers: Dict[str, str]) -> Response:
+        try:
+            r = self.client.post(url, content=body, headers=headers)
+        except self.httpx.TimeoutException as e:
+            raise RetryableError("Request timeout: %s" % e, 'timeout')
+        except self.httpx.TransportError as e:
+            raise RetryableError("Connection error: %s" % e, 'connection')
+        return r.status_code, r.headers, r.content
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class LocalTransport(Transport):
+    # Hand the requests to an in-process handler such as FakeGithub.handle
+    def __init__(self, handler: Callable[[bytes], Response]) -> None:
+        self.handler = handler
+
+    def post(self, url: str, body: bytes, headers: Dict[str, str]) -> Response:
+        return self.handler(body)
+
+
+def get_transport(name: str = 'requests', pool_size: int = 10) -> Transport:
+    if name == 'requests':
+        return RequestsTransport(pool_size)
+    if name == 'http2':
+        return HttpxTransport(pool_size)
+    raise Exception("Unknown transport %s" % name)
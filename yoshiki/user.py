@@ -20,10 +20,13 @@
 # SOFTWARE.
 
 import argparse
+import json
 import logging
-import textwrap
+from typing import Any
 
+from . builder import PAGE_VARIABLES, compile_query
 from . helpers import PaginatedQuery, Raw, Result, Results
+from . records import UserRecord
 
 
 class User(PaginatedQuery):
@@ -33,13 +36,11 @@ class User(PaginatedQuery):
     def __init__(self, args: argparse.Namespace) -> None:
         super().__init__()
         self.username: str = args.username
-
-    def graph_query(self) -> str:
-        return textwrap.dedent(
+        self.document = compile_query(
         """
         {
-          user(login: "%(username)s") {
-            %(connection)s(first: 100%(after)s) {
+          user(login: %(username)s) {
+            %(connection)s(first: $first, after: $after) {
               pageInfo {
                 hasNextPage endCursor
               }
@@ -52,30 +53,35 @@ class User(PaginatedQuery):
             }
           }
         }
-        """ % dict(after=', after: "%s"' % self.after if self.after else '',
-                   username=self.username,
-                   connection=self.connection))
+        """ % dict(username=json.dumps(self.username),
+                   connection=self.connection), PAGE_VARIABLES)
+
+    def graph_query(self) -> str:
+        return self.document
 
     @staticmethod
     def strip(edge: Result) -> Result:
         try:
-            return dict(name=edge['node']['name'], login=edge['node']['login'])
+            return UserRecord(name=edge['node']['name'], login=edge['node']['login'])
         except Exception:
             User.log.exception(f"Failed to parse {edge}")
             return {}
 
-    def transform_result(self, raw: Raw) -> Results:
-        edges = raw['data']['user'][self.connection]['edges']
-        if not self.count:
-            self.count = len(edges)
-            self.log.info(f"{self.count} {self.connection} to fetch")
+    def paginate(self, raw: Raw) -> Any:
+        if self.count is None:
+            self.count = 0
         pageInfo = raw['data']['user'][self.connection]['pageInfo']
         if pageInfo['hasNextPage']:
             self.after = pageInfo['endCursor']
         else:
             self.after = ''
+        return raw['data']['user'][self.connection]['edges']
+
+    def extract(self, edges: Any) -> Results:
+        users = [user for user in [Followers.strip(edge) for edge in edges] if user]
+        self.count = (self.count or 0) + len(users)
         self.log.info(f"{self.count} {self.connection} read")
-        return [user for user in [Followers.strip(edge) for edge in edges] if edges]
+        return users
 
 
 class Followers(User):